@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the migration phases against mock_jira
+───────────────────────────────────────────────────
+For each pair count (default: a single pair and 500 pairs) a fresh mock
+Jira/Confluence is started in its own process, a pairs CSV is written and the
+real code paths run against it:
+
+  role scan    role_sheet_generation.scan_roles → roles CSV
+  jira pairs   migration_engine.run_pairs with groups, filters (discover),
+               issues, roles and both user pickers enabled
+  confluence   bulk_confluence_groups.migrate_row for every CSV row
+  apply plan   with --dry only: migration_engine.apply_plan of the change plan
+               the dry jira step compiled – the cutover write window
+
+Reported per step: wall time, requests, requests/s, 429s and errors, plus the
+wall time of every phase the step recorded (metrics.METRICS for the scripts,
+the run's own Metrics – result["stats"] – for the engine).  Results also go to
+Logs/bench-<time>.json.
+
+  python bench_migration.py [--pairs 1,500] [--latency 0.02] [--rate-429 0.01] [--dry]
+
+Live runs (the default) write to the mock and journal under run ids
+bench-<time>-<pairs> (the plan apply of --dry under bench-<time>-<pairs>-apply).
+Everything the steps write besides the results – journals, per-pair logs,
+metrics reports, change plans – goes to a scratch directory removed at the
+end, so Cache/journal.db and Logs/ only hold real migrations.
+"""
+
+import os, csv, json, time, logging, argparse, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import mock_jira, journal, migration_engine
+from http_transport import new_session, set_host_limit
+from journal import Journal
+from metrics import METRICS, Metrics
+from migration_engine import ROOT, log_to_stdout, ensure_log_dir, read_pairs, run_pairs, apply_plan
+from role_sheet_generation import scan_roles
+from bulk_confluence_groups import GroupCache, migrate_row
+
+def snapshot(wall, m=METRICS):
+    """Totals of the Metrics m after one step."""
+    with m.lock:
+        requests = sum(sum(h) for h in m.hist.values())
+        throttled = sum(v for (_, _, c), v in m.status.items() if c == "429")
+        errors = sum(m.errors.values()) + sum(v for (_, _, c), v in m.status.items()
+                                             if c[0] in "45" and c != "429")
+        phases = {}
+        for (feature, _), dt in m.phases.items():
+            p = phases.setdefault(feature, {"runs": 0, "total_s": 0.0, "max_s": 0.0})
+            p["runs"] += 1; p["total_s"] += dt; p["max_s"] = max(p["max_s"], dt)
+    return {"wall_s": wall, "requests": requests, "rps": requests / wall if wall else 0.0,
+            "throttled": throttled, "errors": errors, "phases": phases}
+
+def step_roles(url, rcsv, workers):
+    METRICS.reset(); t0 = time.perf_counter()
+    sess = new_session("bench", "bench", pool=workers)
+    keys = [p["key"] for p in sess.get(f"{url}/rest/api/2/project").json()]
+    with METRICS.phase("role scan"), open(rcsv, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f); w.writerow(["project_key", "role_name", "role_url", "usernames"])
+        for key, rows in scan_roles(sess, url, keys, workers):
+            for rname, rurl, names in rows or ():
+                if names: w.writerow([key, rname, rurl, ";".join(names)])
+    return snapshot(time.perf_counter() - t0)
+
+def stats(result):
+    m = Metrics(); m.absorb(result["stats"]); return m
+
+def step_jira(url, pairs, o):
+    t0 = time.perf_counter()
+    result = run_pairs(pairs, {**o, "url": url})
+    out = snapshot(time.perf_counter() - t0, stats(result)); out["failed"] = len(result["failed"])
+    out["plan"] = result["plan"]
+    return out
+
+def step_apply(url, plan, o):
+    t0 = time.perf_counter()
+    result = apply_plan(plan, {**o, "url": url, "run_id": o["run_id"] + "-apply"})
+    out = snapshot(time.perf_counter() - t0, stats(result)); out["failed"] = result["failed"]
+    return out
+
+def step_confluence(url, pairs, workers, scratch):
+    METRICS.reset(); t0 = time.perf_counter()
+    sess = new_session("bench", "bench", pool=workers)
+    journal = Journal(os.path.join(scratch, "confluence.db"))
+    cache = GroupCache(sess, url)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for fut in [pool.submit(migrate_row, sess, url, cache, journal, i, s, t)
+                    for i, (s, t) in enumerate(pairs, 1)]: fut.result()
+    journal.close()
+    return snapshot(time.perf_counter() - t0)
+
+def bench(n, a, scratch):
+    cfg = {k: getattr(a, k) for k in mock_jira.CONFIG}; cfg["pairs"] = max(cfg["pairs"], n)
+    proc, url = mock_jira.start(cfg, a.port)
+    try:
+        set_host_limit(url, a.in_flight)
+        pcsv = os.path.join(scratch, f"pairs-{n}.csv"); rcsv = os.path.join(scratch, f"roles-{n}.csv")
+        with open(pcsv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f); w.writerow(["source", "target"])
+            w.writerows(mock_jira.Dataset.pairs_of(cfg["pairs"])[:n])
+        pairs = read_pairs(pcsv)
+        o = {"adm": "bench", "pw": "bench", "dry": a.dry,
+             "groups": True, "filters": True, "filter_discover": True, "issues": True,
+             "roles": True, "roles_csv": rcsv, "single": True, "multi": True,
+             "workers": a.workers, "in_flight": a.in_flight,
+             "run_id": f"bench-{datetime.now():%Y%m%d-%H%M%S}-{n}"}
+        steps = {"role scan": step_roles(url, rcsv, a.in_flight),
+                 "jira pairs": step_jira(url, pairs, o),
+                 "confluence": step_confluence(url, pairs, a.in_flight, scratch)}
+        if a.dry: steps["apply plan"] = step_apply(url, steps["jira pairs"]["plan"], o)
+    finally:
+        proc.terminate(); proc.join()
+    return steps
+
+def report(results):
+    lines = [f"{'pairs':>5}  {'step':12} {'wall s':>8} {'requests':>9} {'req/s':>8} {'429':>6} {'err':>5}"]
+    for n, steps in results.items():
+        for name, s in steps.items():
+            lines.append(f"{n:5}  {name:12} {s['wall_s']:8.2f} {s['requests']:9} {s['rps']:8.1f} "
+                         f"{s['throttled']:6} {s['errors']:5}")
+            for feature, p in sorted(s["phases"].items()):
+                lines.append(f"{'':5}    {feature:20} {p['runs']:5}× total {p['total_s']:8.2f}s  max {p['max_s']:7.2f}s")
+    return "\n".join(lines)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the migration phases against a local mock Jira")
+    ap.add_argument("--pairs", default="1,500", help="comma-separated pair counts (default 1,500)")
+    ap.add_argument("--dry", action="store_true", help="dry jira step, then apply its change plan")
+    ap.add_argument("--workers", type=int, default=4, help="pairs migrated at once")
+    ap.add_argument("--in-flight", type=int, default=8, help="concurrent requests to the mock")
+    ap.add_argument("--port", type=int, default=8799, help="mock port (fixed, so Cache/fields-* is reused)")
+    ap.add_argument("-v", "--verbose", action="store_true", help="log to stdout")
+    for k, v in mock_jira.CONFIG.items():
+        if k != "pairs": ap.add_argument("--" + k.replace("_", "-"), type=type(v), default=v)
+    a = ap.parse_args(argv); a.pairs_list = [int(x) for x in a.pairs.split(",") if x.strip()]
+    a.pairs = max(a.pairs_list)           # one dataset size for every scenario
+    if a.verbose: log_to_stdout()
+    else: ROOT.addHandler(logging.NullHandler())
+
+    path = os.path.join(ensure_log_dir(), f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with tempfile.TemporaryDirectory(prefix="bench-") as scratch:
+        migration_engine.LOG_DIR = os.path.join(scratch, "Logs")
+        journal.DB_PATH = os.path.join(scratch, "journal.db")
+        try:
+            results = {}
+            for n in a.pairs_list:
+                print(f"… {n} pair(s)", flush=True)
+                results[n] = bench(n, a, scratch)
+        finally:
+            migration_engine.LOG_DIR = journal.DB_PATH = None
+    print(report(results))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"args": {k: v for k, v in vars(a).items()}, "results": results}, f, indent=2)
+    print(f"results → {path}")
+
+if __name__ == "__main__":
+    main()
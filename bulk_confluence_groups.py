@@ -4,17 +4,27 @@ Bulk‑migrate Confluence groups from a CSV:
 source_username,target_username
 
 For each pair:
-  1) GET  /rest/api/user/memberof?username=<source>
-  2) For each group, PUT /rest/api/user/<target>/group/<groupName>
+  1) GET  /rest/api/user/memberof?username=<source>   (and <target>)
+  2) For each group the target is missing, PUT /rest/api/user/<target>/group/<groupName>
 
-Stops after 600 rows to avoid runaway.
+Rows run in parallel on a bounded pool; memberof results are fetched once per
+user, so repeated sources/targets and groups the target already has cost
+nothing.
+
+Every PUT is recorded in the checkpoint journal (see journal.py); give the
+run id printed at start to resume an interrupted run without repeating the
+groups already added.
 """
 
-import csv, os, urllib.parse, requests, urllib3
+import csv, os, threading, urllib.parse, urllib3
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from getpass import getpass
+from http_transport import new_session, set_host_limit
+from journal import Journal
+from metrics import METRICS
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-MAX_ROWS = 600          # safety stop
+DEFAULT_WORKERS = 8     # rows migrated at once
 
 # ───────────────────────────────────────────────────────────────────────────
 def fetch_user_groups(session, base, user):
@@ -38,6 +48,69 @@ def add_user_to_group(session, base, target, group):
     r = session.put(url)
     return r.status_code in (200, 204)
 
+class GroupCache:
+    """
+    memberof results per user, fetched once even when several rows ask for the
+    same user at the same time, and kept as read (frozensets).  claim() marks a
+    (user, group) as taken in a separate set, so a target that appears in many
+    rows is only PUT into each group once.
+    """
+    def __init__(self, session, base):
+        self.session, self.base = session, base
+        self.lock = threading.Lock(); self.futures = {}; self.claimed = set()
+
+    def groups(self, user):
+        with self.lock:
+            fut, owner = self.futures.get(user), False
+            if fut is None:
+                fut, owner = Future(), True
+                self.futures[user] = fut
+        if owner:
+            try: fut.set_result(frozenset(fetch_user_groups(self.session, self.base, user)))
+            except Exception as e: fut.set_exception(e)
+        return fut.result()
+
+    def claim(self, user, group):
+        """True if no other row has claimed (user, group) yet; marks it as claimed."""
+        with self.lock:
+            if (user, group) in self.claimed: return False
+            self.claimed.add((user, group)); return True
+
+    def release(self, user, group):
+        with self.lock: self.claimed.discard((user, group))
+
+def migrate_row(session, base, cache, journal, idx, source, target):
+    """Add target to every group of source it is missing; returns the lines to print."""
+    with METRICS.phase("confluence groups", f"{source}→{target}"):
+        return _migrate_row(session, base, cache, journal, idx, source, target)
+
+def _migrate_row(session, base, cache, journal, idx, source, target):
+    out = [f"\n🕵️  [{idx}] Migrating groups for {source} ➜ {target}"]
+    try:
+        groups = sorted(cache.groups(source))
+        members = cache.groups(target)
+    except Exception as e:
+        out.append(f"   ❌ Could not fetch groups: {e}"); return out
+
+    out.append(f"   Groups count: {len(groups)}")
+    added = present = skipped = 0
+    for g in groups:
+        if g in members:
+            present += 1; continue
+        if not cache.claim(target, g) or not journal.begin("confluence", source, target, g):
+            skipped += 1; continue      # another row adds it, or done in the journal
+        ok = add_user_to_group(session, base, target, g)
+        journal.record("confluence", source, target, g, ok)
+        if ok:
+            added += 1
+            out.append(f"   + {target} added to '{g}'")
+        else:
+            cache.release(target, g)
+            out.append(f"   ⚠️  Failed to add to '{g}'")
+    out.append(f"   ✅ Done – {added} added, {present} already member, {skipped} skipped, "
+               f"{len(groups) - added - present - skipped} failed.")
+    return out
+
 # ───────────────────────────────────────────────────────────────────────────
 def main():
     print("🔑 Confluence Group Migration (CSV)")
@@ -45,36 +118,37 @@ def main():
     admin = input("Admin username: ").strip()
     pwd   = getpass("Admin password: ")
     csv_path = input("CSV path (source,target): ").strip()
+    run_id = input("Resume run id (blank = new run): ").strip()
+    workers = int(input(f"Concurrent rows [{DEFAULT_WORKERS}]: ").strip() or DEFAULT_WORKERS)
 
     if not os.path.isfile(csv_path):
         print("❌ CSV not found:", csv_path); return
 
-    session = requests.Session(); session.auth=(admin, pwd); session.verify=False
+    session = new_session(admin, pwd, pool=workers)
+    set_host_limit(base, workers)
+    journal = Journal(run_id=run_id or None)
+    print(f"📒 Journal run id: {journal.run_id}  {journal.summary() or '(new)'}")
 
     with open(csv_path, newline='', encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for idx, (source, target, *_ignored) in enumerate(reader, 1):
-            if idx > MAX_ROWS:
-                print("⚠️  Limit of", MAX_ROWS, "rows reached – stopping.")
-                break
-            source, target = source.strip(), target.strip()
-            if not source or not target: continue
-
-            print(f"\n🕵️  [{idx}] Migrating groups for {source} ➜ {target}")
-            try:
-                groups = fetch_user_groups(session, base, source)
-            except Exception as e:
-                print("   ❌ Could not fetch groups:", e); continue
-
-            print("   Groups count:", len(groups))
-            added = 0
-            for g in groups:
-                if add_user_to_group(session, base, target, g):
-                    added += 1
-                    print(f"   + {target} added to '{g}'")
-                else:
-                    print(f"   ⚠️  Failed to add to '{g}'")
-            print(f"   ✅ Done – {added}/{len(groups)} groups processed.")
+        rows = [(idx, source.strip(), target.strip())
+                for idx, (source, target, *_ignored) in enumerate(csv.reader(f), 1)]
+    rows = [r for r in rows if r[1] and r[2]]
+
+    cache = GroupCache(session, base)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(migrate_row, session, base, cache, journal, *r) for r in rows]
+        for fut in as_completed(futures):
+            print("\n".join(fut.result()))
+
+    left = journal.remaining()
+    print(f"\n📒 Journal {journal.run_id}: {journal.summary()}")
+    if left:
+        print(f"   {len(left)} operation(s) left – rerun with this run id to resume "
+              f"(python journal.py {journal.run_id} lists them).")
+    journal.close()
+    txt, prom = METRICS.write_reports(os.path.dirname(os.path.abspath(csv_path)),
+                                      f"confluence-groups-{journal.run_id}.metrics")
+    print(f"📊 Metrics: {txt}, {prom}")
 
 if __name__ == "__main__":
     main()
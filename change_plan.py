@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Change plan for the migration scripts
+─────────────────────────────────────
+A dry run compiles every write it would make into a plan file (JSON Lines:
+a header line, then one operation per line) with its before and after value:
+
+  {"op": "group",  "src", "tgt", "group", "before": false | null, "after": true}
+  {"op": "role",   "src", "tgt", "project", "role", "url", "before": false, "after": true}
+  {"op": "filter", "src", "tgt", "id", "before": {"owner"}, "after": {"owner"}, "body": {...}}
+  {"op": "issue",  "key", "before": {field: value}, "after": {field: value}, "pairs": [[src, tgt]]}
+
+before is null where the run did not read it (group adds outside sync mode);
+pairs names the users whose mapping produced the issue's edits (for their logs).
+migration_engine.apply_plan() writes a plan without repeating the reads.
+
+Run from the command line for the per-operation diff of a plan:
+
+  python change_plan.py plan.jsonl            # summary and diff
+  python change_plan.py --merge out.jsonl a.jsonl b.jsonl
+"""
+
+import os, sys, json, threading, collections
+from datetime import datetime
+
+FORMAT = 1
+KINDS = ("group", "role", "filter", "issue")     # apply order
+
+class ChangePlan:
+    """Thread-safe list of planned writes against one Jira."""
+    def __init__(self, url="", run_id="", ops=None, created=None):
+        self.url, self.run_id = url, run_id
+        self.created = created or datetime.now().isoformat(timespec="seconds")
+        self.ops = list(ops or []); self.lock = threading.Lock()
+
+    def __len__(self): return len(self.ops)
+
+    def add(self, op, **fields):
+        with self.lock: self.ops.append({"op": op, **fields})
+
+    def by_kind(self):
+        """{kind: [ops]} in apply order."""
+        out = {k: [] for k in KINDS}
+        for o in self.ops: out.setdefault(o["op"], []).append(o)
+        return out
+
+    def counts(self):
+        return dict(collections.Counter(o["op"] for o in self.ops))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.lock, open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"plan": FORMAT, "url": self.url, "run_id": self.run_id,
+                                "created": self.created, "counts": self.counts()}) + "\n")
+            for o in self.ops: f.write(json.dumps(o, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(path + ".tmp", path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            head = json.loads(f.readline() or "{}")
+            if head.get("plan") != FORMAT: raise ValueError(f"{path}: not a change plan (format {FORMAT})")
+            ops = [json.loads(line) for line in f if line.strip()]
+        return cls(head.get("url", ""), head.get("run_id", ""), ops, head.get("created"))
+
+    @classmethod
+    def merge(cls, plans):
+        """One plan from several (e.g. one per CLI shard); edits of the same issue
+        are folded into one op, the first before value of a field winning and
+        multi-user lists combined with merge_user_lists."""
+        plans = list(plans)
+        if len({p.url for p in plans}) > 1: raise ValueError("plans are for different Jira URLs")
+        out = cls(plans[0].url if plans else "", plans[0].run_id if plans else "")
+        issues = {}
+        for p in plans:
+            for o in p.ops:
+                if o["op"] != "issue": out.ops.append(o); continue
+                m = issues.get(o["key"])
+                if m is None:
+                    m = issues[o["key"]] = {"op": "issue", "key": o["key"], "before": {}, "after": {},
+                                            "pairs": []}
+                    out.ops.append(m)
+                for k, v in o["before"].items(): m["before"].setdefault(k, v)
+                for k, v in o["after"].items():
+                    if isinstance(v, list) and isinstance(m["after"].get(k), list):
+                        v = merge_user_lists(m["before"].get(k), m["after"][k], v)
+                    m["after"][k] = v
+                m["pairs"] += [x for x in o.get("pairs", ()) if x not in m["pairs"]]
+        return out
+
+def merge_user_lists(before, a, b):
+    """Two edits of the same multi-user list, both made from before, as one:
+    the users either edit removed are dropped, the ones either added appended."""
+    names = lambda v: [u["name"] for u in v or []]
+    was = names(before)
+    gone = (set(was) - set(names(a))) | (set(was) - set(names(b)))
+    out = [n for n in was if n not in gone]
+    for n in names(a) + names(b):
+        if n not in was and n not in out: out.append(n)
+    return [{"name": n} for n in out]
+
+def _names(v):
+    if v is None: return "∅"
+    if isinstance(v, list): return "[" + ", ".join(u.get("name", "?") for u in v) + "]"
+    if isinstance(v, dict): return v.get("name", json.dumps(v))
+    return json.dumps(v)
+
+def diff_line(o):
+    """One readable line per operation."""
+    k = o["op"]
+    if k == "group":
+        return f"group  {o['group']}: + {o['tgt']} (as {o['src']})" + ("  (membership not read)" if o["before"] is None else "")
+    if k == "role":
+        return f"role   {o['project']}/{o['role']}: + {o['tgt']} (as {o['src']})"
+    if k == "filter":
+        return f"filter {o['id']}: owner {o['before']['owner']} → {o['after']['owner']}"
+    if k == "issue":
+        return f"issue  {o['key']}: " + "; ".join(f"{f} {_names(o['before'].get(f))} → {_names(v)}"
+                                                 for f, v in sorted(o["after"].items()))
+    return json.dumps(o)
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--merge":
+        out = ChangePlan.merge(ChangePlan.load(p) for p in sys.argv[3:]).save(sys.argv[2])
+        print(f"merged {len(sys.argv) - 3} plan(s) → {out}"); return
+    if len(sys.argv) != 2:
+        print("usage: change_plan.py plan.jsonl | --merge out.jsonl plan.jsonl ..."); return
+    plan = ChangePlan.load(sys.argv[1])
+    print(f"plan for {plan.url}  run {plan.run_id or '-'}  created {plan.created}: {plan.counts()}")
+    for ops in plan.by_kind().values():
+        for o in ops: print("  " + diff_line(o))
+
+if __name__ == "__main__":
+    main()
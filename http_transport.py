@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for the Jira / Confluence migration scripts
+────────────────────────────────────────────────────────────────
+• One pooled requests.Session per run (keep-alive + TLS reuse across pairs)
+• Retry with exponential backoff on 5xx, connection resets and timeouts
+• Default (connect, read) timeout, so a stalled socket cannot hold a host slot
+• 429 Retry-After pauses every thread talking to that host, and the gap
+  between requests widens on each 429 and decays again on success
+• Optional cap on in-flight requests per host
+• Every exchange (retries included) is recorded in the session's Metrics
+  (metrics.METRICS unless new_session is given one)
+
+Writes are retried too.  An issue / filter PUT has the same effect when
+repeated; a Jira DC group or role add does not: it is answered 400 when the
+user is already a member – after a retry whose first try was applied before
+it timed out, a resumed run re-posting a pending add, or a plan adding a
+membership the target already has.  Those adds go through add_member(),
+which re-checks a 400 against the membership.
+"""
+
+import time, random, threading, logging, urllib.parse, email.utils, requests
+from requests.adapters import HTTPAdapter
+from metrics import METRICS
+
+POOL_SIZE     = 32                       # keep-alive connections per host
+RETRIES       = 5                        # attempts after the first
+BACKOFF       = 0.5                      # seconds, doubled per attempt
+RETRY_STATUS  = {500, 502, 503, 504}
+MAX_IN_FLIGHT = 8                        # default cap on concurrent requests per host
+MAX_GAP       = 5.0                      # ceiling for the adaptive gap between requests
+TIMEOUT       = (10, 120)                # seconds (connect, read) unless the caller passes one
+
+lg = logging.getLogger("http")
+
+# ──────────────── per-host limits ────────────────
+_hosts = {}; _hosts_lock = threading.Lock()
+
+class Host:
+    """In-flight slots and pacing shared by every session talking to one host."""
+    def __init__(self, limit=MAX_IN_FLIGHT):
+        self.slots = threading.BoundedSemaphore(limit)
+        self.lock = threading.Lock(); self.next_at = 0.0; self.gap = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic(); at = max(now, self.next_at); self.next_at = at + self.gap
+        if at > now: time.sleep(at - now)
+
+    def slow_down(self, pause):
+        with self.lock:
+            self.gap = min(MAX_GAP, max(self.gap * 2, 0.05))
+            self.next_at = max(self.next_at, time.monotonic() + pause)
+
+    def speed_up(self):
+        if self.gap:
+            with self.lock: self.gap = self.gap * 0.9 if self.gap > 0.01 else 0.0
+
+def _host(url):
+    netloc = urllib.parse.urlsplit(url).netloc
+    with _hosts_lock:
+        if netloc not in _hosts: _hosts[netloc] = Host()
+        return _hosts[netloc]
+
+def set_host_limit(url, limit):
+    """Allow at most `limit` concurrent requests to the host of `url`."""
+    netloc = urllib.parse.urlsplit(url).netloc
+    with _hosts_lock: _hosts[netloc] = Host(limit)
+
+def retry_after(r):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), else None."""
+    v = r.headers.get("Retry-After")
+    if not v: return None
+    try: return max(0.0, float(v))
+    except ValueError: pass
+    try: return max(0.0, email.utils.parsedate_to_datetime(v).timestamp() - time.time())
+    except (TypeError, ValueError): return None
+
+# ──────────────── session ────────────────
+class PooledSession(requests.Session):
+    """requests.Session with per-host slots, pacing, retry/backoff and 429 handling."""
+    retries, backoff, metrics = RETRIES, BACKOFF, METRICS
+
+    def request(self, method, url, *a, **kw):
+        if kw.get("timeout") is None: kw["timeout"] = TIMEOUT
+        host = _host(url)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+            host.wait()
+            with host.slots:
+                t0 = time.perf_counter()
+                try:
+                    r = super().request(method, url, *a, **kw)
+                except Exception as e:
+                    self.metrics.observe(method, url, time.perf_counter() - t0, error=e.__class__.__name__)
+                    if last or not isinstance(e, (requests.ConnectionError, requests.Timeout,
+                                                  requests.exceptions.ChunkedEncodingError)): raise
+                    err = e
+                else:
+                    err = None
+                    body = r.request.body or b""
+                    self.metrics.observe(method, url, time.perf_counter() - t0, r.status_code,
+                                         len(body), len(r.content))
+            if err is not None:
+                lg.warning("%s %s: %s – retry in %.1fs", method, url, err.__class__.__name__, delay)
+                time.sleep(delay); continue
+            if r.status_code == 429 and not last:
+                pause = retry_after(r) or delay
+                lg.warning("%s %s: 429 – host paused %.1fs", method, url, pause)
+                host.slow_down(pause); continue
+            if r.status_code in RETRY_STATUS and not last:
+                lg.warning("%s %s: %s – retry in %.1fs", method, url, r.status_code, delay)
+                time.sleep(delay); continue
+            host.speed_up()
+            return r
+
+def new_session(user, pw, pool=POOL_SIZE, verify=False, metrics=None):
+    """Authenticated PooledSession; share one per run across threads and pairs.
+    Its requests are recorded in metrics (a metrics.Metrics), else METRICS."""
+    s = PooledSession(); s.auth = (user, pw); s.verify = verify
+    if metrics is not None: s.metrics = metrics
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool)
+    s.mount("https://", adapter); s.mount("http://", adapter)
+    return s
+
+def add_member(s, url, is_member, **kw):
+    """POST a group / role add to url; (ok, status).  A 400 counts as done if
+    is_member() – called after it – finds the user in (see above)."""
+    r = s.post(url, **kw)
+    if r.status_code == 400 and is_member(): return True, "400 (already a member)"
+    return r.ok, r.status_code
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Checkpoint journal for the migration scripts
+────────────────────────────────────────────
+SQLite file (Cache/journal.db) holding every write a run intends to make,
+keyed by (run id, feature, source, target, object id):
+
+  pending → planned, not confirmed yet
+  done    → written successfully; skipped when the run is resumed
+  failed  → last attempt failed; retried when the run is resumed
+
+Run from the command line to list runs, or what is left of one run:
+
+  python journal.py                 # runs and their counts
+  python journal.py <run_id>        # pending / failed operations
+"""
+
+import os, sys, uuid, sqlite3, threading
+from datetime import datetime
+
+def new_run_id():
+    """<time>-<random>: runs started in the same second (GUI and CLI, two cron
+    jobs) must not share a run, or each would skip the other's work as done."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+DB_PATH = None   # Cache/journal.db unless set (bench_migration points it at its scratch dir)
+
+def default_path():
+    if DB_PATH: return DB_PATH
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Cache")
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, "journal.db")
+
+class Journal:
+    """Thread-safe handle on one run of the journal."""
+    def __init__(self, path=None, run_id=None):
+        self.path = path or default_path()
+        self.run_id = run_id or new_run_id()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL"); self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS ops(
+                             run_id TEXT, feature TEXT, source TEXT, target TEXT, object_id TEXT,
+                             status TEXT, detail TEXT, ts TEXT,
+                             PRIMARY KEY(run_id, feature, source, target, object_id))""")
+        self.done_keys = {k for k in self.db.execute(
+            "SELECT feature, source, target, object_id FROM ops WHERE run_id=? AND status='done'",
+            (self.run_id,))}
+
+    def done(self, feature, src, tgt, oid):
+        """True if this operation already succeeded in this run."""
+        return (feature, src, tgt, str(oid)) in self.done_keys
+
+    def _set(self, feature, src, tgt, oid, status, detail="", keep_done=False):
+        key = (feature, src, tgt, str(oid))
+        with self.lock:
+            if keep_done and key in self.done_keys: return
+            self.db.execute("INSERT OR REPLACE INTO ops VALUES(?,?,?,?,?,?,?,?)",
+                            (self.run_id, *key, status, str(detail),
+                             datetime.now().isoformat(timespec="seconds")))
+            if status == "done": self.done_keys.add(key)
+
+    def plan(self, feature, src, tgt, oid):
+        self._set(feature, src, tgt, oid, "pending", keep_done=True)
+
+    def plan_many(self, feature, items):
+        """plan() for many (source, target, object_id) in one transaction."""
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = [(self.run_id, feature, src, tgt, str(oid), "pending", "", now) for src, tgt, oid in items
+                if (feature, src, tgt, str(oid)) not in self.done_keys]
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR REPLACE INTO ops VALUES(?,?,?,?,?,?,?,?)", rows)
+            self.db.execute("COMMIT")
+
+    def begin(self, feature, src, tgt, oid):
+        """False if the operation is already done, else mark it pending and return True."""
+        if self.done(feature, src, tgt, oid): return False
+        self.plan(feature, src, tgt, oid); return True
+
+    def record(self, feature, src, tgt, oid, ok, detail=""):
+        """Mark the operation done or failed after the write returned."""
+        self._set(feature, src, tgt, oid, "done" if ok else "failed", detail)
+
+    def summary(self):
+        """{status: count} for this run."""
+        with self.lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM ops WHERE run_id=? GROUP BY status",
+                                        (self.run_id,)).fetchall())
+
+    def remaining(self):
+        """(feature, source, target, object_id, status, detail) not yet done in this run."""
+        with self.lock:
+            return self.db.execute("""SELECT feature, source, target, object_id, status, detail FROM ops
+                                      WHERE run_id=? AND status!='done'
+                                      ORDER BY feature, source, object_id""", (self.run_id,)).fetchall()
+
+    def close(self):
+        self.db.close()
+
+def runs(path=None):
+    """[(run_id, done, pending, failed, last update)] newest first."""
+    db = sqlite3.connect(path or default_path())
+    try:
+        return db.execute("""SELECT run_id, SUM(status='done'), SUM(status='pending'),
+                                    SUM(status='failed'), MAX(ts)
+                             FROM ops GROUP BY run_id ORDER BY MAX(ts) DESC""").fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        db.close()
+
+def main():
+    if len(sys.argv) < 2:
+        for run_id, done, pending, failed, ts in runs():
+            print(f"{run_id}  done={done} pending={pending} failed={failed}  (last {ts})")
+        return
+    j = Journal(run_id=sys.argv[1])
+    print(f"run {j.run_id}: {j.summary()}")
+    for feature, src, tgt, oid, status, detail in j.remaining():
+        print(f"  {status:7} {feature:10} {src} → {tgt}  {oid}  {detail}")
+
+if __name__ == "__main__":
+    main()
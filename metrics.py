@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Request / phase instrumentation for the migration scripts
+─────────────────────────────────────────────────────────
+• Every HTTP exchange made through http_transport (retries included) is
+  recorded per endpoint template and method: count, status codes, errors,
+  bytes sent/received and a latency histogram
+• phase() times a feature for one pair (or a whole cross-pair step)
+• write_reports() writes a readable summary and a Prometheus text file
+• export() / absorb() carry a run's counters across processes (CLI shards)
+
+Endpoint templates turn /rest/api/2/issue/ABC-1 into "issue/{key}" etc., so
+the numbers add up per API call type rather than per object.
+"""
+
+import os, re, time, threading, collections, urllib.parse
+from contextlib import contextmanager
+from datetime import datetime
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)     # seconds
+SAMPLES = 10000                                       # latencies kept per endpoint for percentiles
+
+TEMPLATES = [(re.compile(p), t) for p, t in (
+    (r"/rest/api/2/search$",                    "search"),
+    (r"/rest/api/2/issue/[^/]+$",               "issue/{key}"),
+    (r"/rest/api/2/group/user$",                "group/user"),
+    (r"/rest/api/2/user$",                      "user"),
+    (r"/rest/api/2/field$",                     "field"),
+    (r"/rest/api/2/filter/search$",             "filter/search"),
+    (r"/rest/api/2/filter/[^/]+$",              "filter/{id}"),
+    (r"/rest/api/2/project$",                   "project"),
+    (r"/rest/api/2/project/[^/]+/role$",        "project/{key}/role"),
+    (r"/rest/api/2/project/[^/]+/role/[^/]+$",  "project/{key}/role/{id}"),
+    (r"/rest/api/user/memberof$",               "confluence user/memberof"),
+    (r"/rest/api/user/[^/]+/group/[^/]+$",      "confluence user/{user}/group/{group}"),
+)]
+
+def endpoint(url):
+    """Template for a request URL: known API paths by name, else digits → {id}."""
+    path = urllib.parse.urlsplit(url).path
+    for rx, name in TEMPLATES:
+        if rx.search(path): return name
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path)
+
+class Metrics:
+    """Thread-safe counters for one run.  Engine runs keep their own (on their
+    session); METRICS below is the instance of the single-run scripts."""
+    def __init__(self):
+        self.lock = threading.Lock(); self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.status = collections.Counter()        # (endpoint, method, status) → n
+            self.errors = collections.Counter()        # (endpoint, method, exception) → n
+            self.sent = collections.Counter()          # (endpoint, method) → bytes
+            self.received = collections.Counter()
+            self.hist = {}                             # (endpoint, method) → [bucket counts..., +Inf]
+            self.total = collections.Counter()         # (endpoint, method) → seconds
+            self.samples = {}                          # (endpoint, method) → deque of seconds
+            self.phases = {}                           # (feature, pair) → seconds
+
+    def observe(self, method, url, seconds, status=None, sent=0, received=0, error=None):
+        key = (endpoint(url), method.upper())
+        with self.lock:
+            if error is None: self.status[(*key, str(status))] += 1
+            else: self.errors[(*key, error)] += 1
+            self.sent[key] += sent; self.received[key] += received; self.total[key] += seconds
+            h = self.hist.setdefault(key, [0] * (len(BUCKETS) + 1))
+            h[next((i for i, b in enumerate(BUCKETS) if seconds <= b), len(BUCKETS))] += 1
+            self.samples.setdefault(key, collections.deque(maxlen=SAMPLES)).append(seconds)
+
+    @contextmanager
+    def phase(self, feature, pair="*"):
+        t0 = time.perf_counter()
+        try: yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self.lock: self.phases[(feature, pair)] = self.phases.get((feature, pair), 0.0) + dt
+
+    def export(self):
+        """The counters as plain lists and numbers (picklable, JSON-safe)."""
+        with self.lock:
+            return {"started": self.started,
+                    "status": [[*k, v] for k, v in self.status.items()],
+                    "errors": [[*k, v] for k, v in self.errors.items()],
+                    "sent": [[*k, v] for k, v in self.sent.items()],
+                    "received": [[*k, v] for k, v in self.received.items()],
+                    "hist": [[*k, h] for k, h in self.hist.items()],
+                    "total": [[*k, v] for k, v in self.total.items()],
+                    "samples": [[*k, list(d)] for k, d in self.samples.items()],
+                    "phases": [[*k, v] for k, v in self.phases.items()]}
+
+    def absorb(self, data):
+        """Add another run's export() to these counters (the earlier start wins)."""
+        with self.lock:
+            self.started = min(self.started, data["started"])
+            for name in ("status", "errors", "sent", "received", "total"):
+                c = getattr(self, name)
+                for *k, v in data[name]: c[tuple(k)] += v
+            for *k, h in data["hist"]:
+                mine = self.hist.setdefault(tuple(k), [0] * len(h))
+                for i, v in enumerate(h): mine[i] += v
+            for *k, d in data["samples"]:
+                self.samples.setdefault(tuple(k), collections.deque(maxlen=SAMPLES)).extend(d)
+            for *k, v in data["phases"]:
+                self.phases[tuple(k)] = self.phases.get(tuple(k), 0.0) + v
+
+    # ───── reports ─────
+    def summary(self):
+        """Readable report: per-endpoint table, per-feature phase totals, slowest pairs."""
+        with self.lock:
+            keys = sorted(self.hist)
+            lines = [f"Run summary  {datetime.fromtimestamp(self.started):%Y-%m-%d %H:%M:%S}"
+                     f"  wall {time.time() - self.started:.1f}s", "",
+                     f"{'endpoint':40} {'method':6} {'count':>7} {'err':>5} {'p50':>7} {'p95':>7} "
+                     f"{'max':>7} {'sum s':>8} {'KiB out':>8} {'KiB in':>9}  status"]
+            for k in keys:
+                s = sorted(self.samples[k]); n = sum(self.hist[k])
+                err = sum(v for (e, m, _), v in self.errors.items() if (e, m) == k)
+                codes = ", ".join(f"{c}×{v}" for (e, m, c), v in sorted(self.status.items()) if (e, m) == k)
+                pct = lambda p: s[min(len(s) - 1, int(p * len(s)))]
+                lines.append(f"{k[0][:40]:40} {k[1]:6} {n:7} {err:5} {pct(.5):7.3f} {pct(.95):7.3f} "
+                             f"{s[-1]:7.3f} {self.total[k]:8.1f} {self.sent[k] / 1024:8.1f} "
+                             f"{self.received[k] / 1024:9.1f}  {codes}")
+            for (e, m, exc), v in sorted(self.errors.items()):
+                lines.append(f"  ! {e} {m}: {exc} ×{v}")
+            by_feature = collections.defaultdict(list)
+            for (feature, pair), dt in self.phases.items(): by_feature[feature].append((dt, pair))
+            lines += ["", f"{'phase':20} {'runs':>6} {'total s':>9} {'max s':>8}  slowest"]
+            for feature, rows in sorted(by_feature.items()):
+                rows.sort(reverse=True)
+                lines.append(f"{feature:20} {len(rows):6} {sum(d for d, _ in rows):9.1f} {rows[0][0]:8.1f}  "
+                             + ", ".join(f"{p} {d:.1f}s" for d, p in rows[:3]))
+        return "\n".join(lines) + "\n"
+
+    def prometheus(self):
+        """Prometheus text exposition format."""
+        esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        lab = lambda **kw: "{" + ",".join(f'{k}="{esc(v)}"' for k, v in kw.items()) + "}"
+        out = []
+        def metric(name, kind, help_, rows):
+            out.append(f"# HELP {name} {help_}"); out.append(f"# TYPE {name} {kind}")
+            out.extend(f"{name}{labels} {value}" for labels, value in rows)
+        with self.lock:
+            metric("migration_http_requests_total", "counter", "HTTP exchanges by endpoint, method and status",
+                   [(lab(endpoint=e, method=m, status=c), v) for (e, m, c), v in sorted(self.status.items())])
+            metric("migration_http_errors_total", "counter", "HTTP exchanges that raised",
+                   [(lab(endpoint=e, method=m, error=x), v) for (e, m, x), v in sorted(self.errors.items())])
+            metric("migration_http_request_bytes_total", "counter", "Request body bytes",
+                   [(lab(endpoint=e, method=m), v) for (e, m), v in sorted(self.sent.items())])
+            metric("migration_http_response_bytes_total", "counter", "Response body bytes",
+                   [(lab(endpoint=e, method=m), v) for (e, m), v in sorted(self.received.items())])
+            rows = []
+            for (e, m), h in sorted(self.hist.items()):
+                acc = 0
+                for b, c in zip((*BUCKETS, "+Inf"), h):
+                    acc += c; rows.append((lab(endpoint=e, method=m, le=b), acc))
+            out.append("# HELP migration_http_request_duration_seconds HTTP exchange latency")
+            out.append("# TYPE migration_http_request_duration_seconds histogram")
+            out.extend(f"migration_http_request_duration_seconds_bucket{l} {v}" for l, v in rows)
+            for (e, m), h in sorted(self.hist.items()):
+                out.append(f"migration_http_request_duration_seconds_sum{lab(endpoint=e, method=m)} {self.total[(e, m)]:.6f}")
+                out.append(f"migration_http_request_duration_seconds_count{lab(endpoint=e, method=m)} {sum(h)}")
+            per = collections.defaultdict(lambda: [0.0, 0])
+            for (feature, _), dt in self.phases.items(): per[feature][0] += dt; per[feature][1] += 1
+            metric("migration_phase_seconds_total", "counter", "Time spent per feature phase, summed over pairs",
+                   [(lab(feature=f), f"{v[0]:.6f}") for f, v in sorted(per.items())])
+            metric("migration_phase_runs_total", "counter", "Feature phases run (pairs)",
+                   [(lab(feature=f), v[1]) for f, v in sorted(per.items())])
+        return "\n".join(out) + "\n"
+
+    def write_reports(self, folder, name):
+        """Write <folder>/<name>.txt and <name>.prom; returns both paths."""
+        os.makedirs(folder, exist_ok=True)
+        txt, prom = os.path.join(folder, name + ".txt"), os.path.join(folder, name + ".prom")
+        with open(txt, "w", encoding="utf-8") as f: f.write(self.summary())
+        with open(prom, "w", encoding="utf-8") as f: f.write(self.prometheus())
+        return txt, prom
+
+METRICS = Metrics()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Headless Jira DC migration runner
+─────────────────────────────────
+Runs migration_engine from a JSON job file – no tkinter, so it starts fast
+and runs from a job scheduler.  The job holds the same options as the GUI
+(see migration_engine.DEFAULTS) plus the pairs:
+
+  {"url": "https://jira.company.com", "adm": "admin",
+   "pairs_csv": "pairs.csv",                  # or "pairs": [["src","tgt"], ...]
+   "dry": true, "groups": true, "issues": true,
+   "roles": true, "roles_csv": "roles_all_projects.csv"}
+
+The password comes from $JIRA_PASSWORD, "pw" in the job, or a prompt.
+
+  python migrate_cli.py job.json [--shards N] [--live] [--run-id ID] [--plan PATH]
+  python migrate_cli.py job.json --apply plan.jsonl [--check] [--run-id ID]
+
+--shards splits the pairs across N worker processes sharing one journal run
+id.  Sources are dealt out round-robin, all pairs of a source to one shard, so
+a source listed with several targets is refused as in an unsharded run.  The
+shards' results are merged and written to Logs/cli-<run>.json, their request /
+phase counters into one Logs/metrics-<run>-shards report.
+
+The shards hand their issue edits back instead of writing them: the parent
+merges the edits of every shard (multi-user pickers included) and writes one
+PUT per issue, so shards touching the same issue do not overwrite each other.
+An issue two shards set to different users in the same assignee / reporter /
+single picker is left alone and its pairs are reported failed.
+
+A dry run writes a change plan (--plan, default Logs/plan-<run>.jsonl; the
+shards' plans are merged into it) – review it with change_plan.py.  --apply
+writes such a plan without re-reading anything (the job supplies the
+credentials and "in_flight"; its "url", if set, must match the plan).
+--check re-reads each filter / issue first and leaves it alone if it changed
+since the dry run.
+
+Exits 1 if a pair failed or the run's journal still holds failed / pending
+writes (a write Jira refused), else 0.
+"""
+
+import os, sys, json, logging, argparse
+from concurrent.futures import ProcessPoolExecutor
+from getpass import getpass
+from migration_engine import (ROOT, DEFAULTS, log_to_stdout, ensure_log_dir, read_pairs, run_pairs,
+                              write_issues, apply_plan)
+from journal import Journal, new_run_id
+from change_plan import ChangePlan
+from metrics import Metrics
+
+def load_job(path, need_pairs=True):
+    with open(path, encoding="utf-8") as f:
+        job = json.load(f)
+    unknown = set(job) - set(DEFAULTS) - {"pairs", "pairs_csv"}
+    if unknown: raise SystemExit(f"unknown job option(s): {', '.join(sorted(unknown))}")
+    if "pairs" in job:
+        pairs = [tuple(p) for p in job.pop("pairs")]
+    elif "pairs_csv" in job:
+        pairs = read_pairs(job.pop("pairs_csv"))
+    elif need_pairs:
+        raise SystemExit("job needs \"pairs\" or \"pairs_csv\"")
+    else:
+        pairs = []
+    return pairs, job
+
+def shard_pairs(pairs, n):
+    """pairs split into at most n non-empty shards, sources dealt out
+    round-robin in first-seen order with all of a source's pairs together."""
+    by_src = {}
+    for p in pairs: by_src.setdefault(p[0], []).append(p)
+    shards = [[] for _ in range(n)]
+    for i, ps in enumerate(by_src.values()): shards[i % n] += ps
+    return [s for s in shards if s]
+
+def run_shard(n, pairs, o):
+    """Worker-process entry: its own stdout handler tagged with the shard number;
+    a dry run's plan goes to <plan>.shard<n>, merged by the parent.  The issue
+    edits come back in the result for the parent to write (write_issues)."""
+    for h in ROOT.handlers[:]: ROOT.removeHandler(h)
+    log_to_stdout(logging.Formatter(f"%(asctime)s [shard {n}] %(levelname)s - %(message)s"))
+    o = {**o, "defer_issues": True}
+    if o.get("plan"): o = {**o, "plan": f"{o['plan']}.shard{n}"}
+    return run_pairs(pairs, o)
+
+def merge(results, plan=None, issues=None, metrics=None, run_id=""):
+    """Shard results → one; the journal counts are re-read since shards share the
+    run, and the shards' change plans (plus issues, the ChangePlan of their
+    merged issue edits) are merged into plan.  The shards' counters are added
+    to metrics (the parent's, holding its issue writes) and reported as one,
+    Logs/metrics-<run_id>-shards."""
+    metrics = metrics or Metrics()
+    out = {"pairs": 0, "failed": [], "run_id": None, "journal": {}, "plan": None}
+    for r in results:
+        out["pairs"] += r["pairs"]; out["failed"] += r["failed"]
+        out["run_id"] = out["run_id"] or r["run_id"]
+        metrics.absorb(r["stats"])
+    if out["run_id"]:
+        j = Journal(run_id=out["run_id"]); out["journal"] = j.summary(); j.close()
+    parts = [r["plan"] for r in results if r.get("plan")]
+    if plan and (parts or issues):
+        plans = [ChangePlan.load(p) for p in parts] + ([issues] if issues else [])
+        out["plan"] = ChangePlan.merge(plans).save(plan)
+        for p in parts: os.remove(p)
+    out["metrics"] = metrics.write_reports(ensure_log_dir(), f"metrics-{run_id or out['run_id'] or os.getpid()}-shards")
+    out["stats"] = metrics.export()
+    return out
+
+def save_result(result, path):
+    """The result as JSON, without the raw counters ("stats") its metrics reports hold."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({k: v for k, v in result.items() if k != "stats"}, f, indent=2)
+
+def exit_status(result):
+    """1 if a pair failed or the journal holds failed / pending writes, else 0."""
+    journal = result.get("journal") or {}
+    return 1 if result["failed"] or journal.get("failed") or journal.get("pending") else 0
+
+def positive(v):
+    n = int(v)
+    if n < 1: raise argparse.ArgumentTypeError(f"must be at least 1, got {v}")
+    return n
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless Jira DC migration")
+    ap.add_argument("job", help="JSON job file")
+    ap.add_argument("--shards", type=positive, default=1, help="worker processes (default 1)")
+    ap.add_argument("--live", action="store_true", help="write changes (overrides \"dry\" in the job)")
+    ap.add_argument("--run-id", help="resume this journal run id")
+    ap.add_argument("--plan", help="where a dry run writes its change plan")
+    ap.add_argument("--apply", metavar="PLAN", help="write this change plan instead of running the pairs")
+    ap.add_argument("--check", action="store_true", help="with --apply: skip filters / issues changed since the plan")
+    a = ap.parse_args(argv)
+
+    pairs, o = load_job(a.job, need_pairs=not a.apply)
+    if a.live: o["dry"] = False
+    o["pw"] = os.environ.get("JIRA_PASSWORD") or o.get("pw") or getpass("Admin password: ")
+    # shards share one run id so an interrupted sharded run resumes as a whole
+    o["run_id"] = a.run_id or o.get("run_id") or new_run_id()
+
+    if a.apply:
+        log_to_stdout()
+        o["check"] = a.check or o.get("check", False)
+        result = apply_plan(a.apply, o)
+        path = os.path.join(ensure_log_dir(), f"cli-apply-{o['run_id']}.json")
+        save_result(result, path)
+        return exit_status(result)
+
+    if o.get("dry", DEFAULTS["dry"]):
+        o["plan"] = a.plan or o.get("plan") or os.path.join(ensure_log_dir(), f"plan-{o['run_id']}.jsonl")
+
+    shards = shard_pairs(pairs, a.shards)
+    if len(shards) <= 1:
+        log_to_stdout()
+        result = run_pairs(pairs, o)
+    else:
+        log_to_stdout()
+        ROOT.info("%d pair(s) across %d shard(s)", len(pairs), len(shards))
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            results = list(pool.map(run_shard, range(1, len(shards) + 1), shards, [o] * len(shards)))
+        metrics = Metrics()
+        issues, refused = write_issues([r.pop("issues") for r in results], o, metrics)
+        result = merge(results, o.get("plan"), issues, metrics, o["run_id"])
+        result["failed"] += refused
+
+    path = os.path.join(ensure_log_dir(), f"cli-{o['run_id']}.json")
+    save_result(result, path)
+    ROOT.info("result: %d pair(s), %d failed, journal %s → %s",
+              result["pairs"], len(result["failed"]), result["journal"], path)
+    return exit_status(result)
+
+if __name__ == "__main__":
+    sys.exit(main())
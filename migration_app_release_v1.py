@@ -7,131 +7,30 @@ Jira DC Migration GUI  ·  April 2025  (Layout + BooleanVar patch)
 • Dry-run toggle
 • Picker migrations each have “Unresolved only”
 • FIX: BooleanVar is no longer used as dict key (avoids TypeError)
+• Migration logic lives in migration_engine (headless: migrate_cli.py)
+• Log pane shows the last LOG_LINES lines, one insert per tick; the full log
+  goes to Logs/gui-<date>.log (optional JSONL copy per run)
+• Dry runs write a change plan to Logs/plan-<time>.jsonl; APPLY PLAN writes one
 """
 
-import os, sys, csv, queue, threading, logging, requests, urllib3
-from datetime import datetime, timezone
+import os, threading, logging, collections
+from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from migration_engine import (ROOT, FMT, PAIR_WORKERS, MAX_IN_FLIGHT,
+                              log_to_stdout, ensure_log_dir, read_pairs, run_pairs, apply_plan)
 
 # ──────────────── logging set-up ────────────────
-ROOT = logging.getLogger()
-ROOT.setLevel(logging.INFO)
-FMT = logging.Formatter("%(asctime)s %(levelname)s - %(message)s")
-ROOT.addHandler(logging.StreamHandler(sys.stdout))
+log_to_stdout()
+LOG_LINES=5000   # lines kept in the log pane (and in the pending buffer)
+PUMP_MS=200      # log pane refresh interval
 
 class QueueHandler(logging.Handler):
+    """Formatted lines into a bounded deque; the oldest drop off if the pane falls behind."""
     def __init__(self,q): super().__init__(); self.q=q
-    def emit(self,rec): self.q.put(self.format(rec))
+    def emit(self,rec): self.q.append(self.format(rec))
 
 queue_handler=None
-def ensure_log_dir():
-    path=os.path.join(os.path.dirname(__file__),"Logs")
-    os.makedirs(path,exist_ok=True); return path
-
-# ─────────────── Jira helper functions (unchanged logic) ───────────────
-def migr_groups(base,u,pw,src,tgt,exclude,dry):
-    lg=logging.getLogger("groups")
-    skip={g.strip() for g in exclude.split(",") if g.strip()}
-    s=requests.Session(); s.auth=(u,pw); s.verify=False
-    r=s.get(f"{base}/rest/api/2/user",params={"username":src,"expand":"groups"})
-    if r.status_code!=200: lg.error("groups fetch %s %s",r.status_code,r.text[:120]); return
-    for g in r.json()["groups"]["items"]:
-        name=g["name"]
-        if name in skip: lg.info("skip group %s",name); continue
-        if dry: lg.info("[dry] add %s→%s",tgt,name); continue
-        resp=s.post(f"{base}/rest/api/2/group/user?groupname={name}",json={"name":tgt})
-        lg.info("%s → %s (%s)",name,tgt,resp.status_code)
-
-def migr_filters(base,u,pw,fcsv,src,tgt,dry):
-    lg=logging.getLogger("filters")
-    if not os.path.isfile(fcsv): lg.error("filter CSV missing: %s",fcsv); return
-    s=requests.Session(); s.auth=(u,pw); s.verify=False
-    for fid,owner,*_ in csv.reader(open(fcsv,encoding="utf-8-sig")):
-        if owner!=src: continue
-        if dry: lg.info("[dry] filter %s owner→%s",fid,tgt); continue
-        url=f"{base}/rest/api/2/filter/{fid}"
-        data=s.get(url).json(); data["owner"]={"name":tgt}
-        r=s.put(url,params={"overrideSharePermissions":"true"},json=data)
-        lg.info("filter %s status %s",fid,r.status_code)
-
-def migr_issues(base,u,pw,src,tgt,unres,dry):
-    lg=logging.getLogger("issues")
-    s=requests.Session(); s.auth=(u,pw); s.verify=False
-    jql=f'(assignee="{src}" OR reporter="{src}")'
-    if unres: jql+=' AND resolution=Unresolved'
-    start=0
-    while True:
-        r=s.post(f"{base}/rest/api/2/search",
-                 json={"jql":jql,"startAt":start,"maxResults":100,
-                       "fields":["assignee","reporter"]})
-        if r.status_code!=200: lg.error("search err %s",r.status_code); break
-        d=r.json(); issues=d["issues"]
-        if not issues: break
-        for it in issues:
-            key=it["key"]; upd={}
-            if it["fields"]["assignee"] and it["fields"]["assignee"]["name"]==src:
-                upd["assignee"]={"name":tgt}
-            if it["fields"]["reporter"] and it["fields"]["reporter"]["name"]==src:
-                upd["reporter"]={"name":tgt}
-            if not upd: continue
-            if dry: lg.info("[dry] issue %s",key); continue
-            s.put(f"{base}/rest/api/2/issue/{key}?notifyUsers=false",
-                  json={"fields":upd},
-                  headers={"Content-Type":"application/json"})
-            lg.info("issue %s updated",key)
-        start+=len(issues)
-        if start>=d["total"]: break
-
-def fast_roles(sess,base,rcsv,src,tgt,dry):
-    lg=logging.getLogger("roles")
-    if not os.path.isfile(rcsv): lg.error("roles CSV missing: %s",rcsv); return
-    for row in csv.DictReader(open(rcsv,encoding="utf-8")):
-        if src not in row["usernames"].split(";"): continue
-        if dry: lg.info("[dry] role %s/%s",row["project_key"],row["role_name"]); continue
-        r=sess.post(row["role_url"],json={"user":[tgt]})
-        lg.info("%s/%s → %s (%s)",row["project_key"],row["role_name"],tgt,r.status_code)
-
-def single_picker(sess,base,src,tgt,unres,dry):
-    lg=logging.getLogger("singleCF")
-    fields=[f for f in sess.get(f"{base}/rest/api/2/field").json()
-            if f.get("custom") and f["schema"]["custom"].endswith(":userpicker")]
-    for f in fields:
-        fid=f["id"]; cf=fid.replace("customfield_","")
-        jql=f'cf[{cf}] = "{src}"'
-        if unres: jql+=' AND resolution=Unresolved'
-        r=sess.get(f"{base}/rest/api/2/search",
-                   params={"jql":jql,"fields":[fid],"maxResults":500})
-        if r.status_code!=200: continue
-        for it in r.json()["issues"]:
-            key=it["key"]
-            if dry: lg.info("[dry] %s on %s",fid,key); continue
-            sess.put(f"{base}/rest/api/2/issue/{key}?notifyUsers=false",
-                     json={"fields":{fid:{"name":tgt}}},
-                     headers={"Content-Type":"application/json"})
-            lg.info("%s → %s on %s",fid,tgt,key)
-
-def multi_picker(sess,base,src,tgt,unres,dry):
-    lg=logging.getLogger("multiCF")
-    fields=[f for f in sess.get(f"{base}/rest/api/2/field").json()
-            if f.get("custom") and f["schema"]["custom"].endswith(":multiuserpicker")]
-    for f in fields:
-        fid=f["id"]; cf=fid.replace("customfield_","")
-        jql=f'cf[{cf}] = "{src}"'
-        if unres: jql+=' AND resolution=Unresolved'
-        r=sess.get(f"{base}/rest/api/2/search",
-                   params={"jql":jql,"fields":[fid],"maxResults":500})
-        if r.status_code!=200: continue
-        for it in r.json()["issues"]:
-            key=it["key"]; cur=it["fields"][fid] or []
-            names=[u["name"] for u in cur if u["name"]!=src]
-            if tgt not in names: names.append(tgt)
-            if dry: lg.info("[dry] %s on %s",fid,key); continue
-            sess.put(f"{base}/rest/api/2/issue/{key}?notifyUsers=false",
-                     json={"fields":{fid:[{"name":n} for n in names]}},
-                     headers={"Content-Type":"application/json"})
-            lg.info("%s updated on %s",fid,key)
 
 # ───────────────────── GUI class ─────────────────────
 class MigrationGUI(tk.Tk):
@@ -140,13 +39,16 @@ class MigrationGUI(tk.Tk):
         self.title("Jira DC Migration GUI – April 2025 patch")
         self.geometry("1180x900")
 
-        self.q=queue.Queue()
+        self.q=collections.deque(maxlen=LOG_LINES)
         global queue_handler
         if queue_handler is None:
             queue_handler=QueueHandler(self.q); queue_handler.setFormatter(FMT)
             ROOT.addHandler(queue_handler)
 
         self.logs_dir=ensure_log_dir()
+        full=logging.FileHandler(os.path.join(self.logs_dir,f"gui-{datetime.now():%Y%m%d}.log"),
+                                 mode="a",encoding="utf-8"); full.setFormatter(FMT)
+        ROOT.addHandler(full)
 
         # form vars
         self.url=tk.StringVar(); self.adm=tk.StringVar(); self.pw=tk.StringVar()
@@ -155,13 +57,20 @@ class MigrationGUI(tk.Tk):
 
         # feature vars + sub-options
         self.v_group=tk.BooleanVar();  self.exclude=tk.StringVar()
+        self.group_sync=tk.BooleanVar(value=True)
         self.v_filter=tk.BooleanVar(); self.filter_csv=tk.StringVar()
+        self.filter_discover=tk.BooleanVar()
         self.v_issue=tk.BooleanVar();  self.issue_unres=tk.BooleanVar(value=True)
+        self.issue_batch=tk.BooleanVar(value=True)
         self.v_roles=tk.BooleanVar();  self.roles_csv=tk.StringVar()
         self.v_single=tk.BooleanVar(); self.single_unres=tk.BooleanVar(value=True)
         self.v_multi=tk.BooleanVar();  self.multi_unres=tk.BooleanVar(value=True)
 
-        self._build(); self.after(200,self._pump)
+        # scheduler
+        self.workers=tk.IntVar(value=PAIR_WORKERS); self.in_flight=tk.IntVar(value=MAX_IN_FLIGHT)
+        self.run_id=tk.StringVar(); self.jsonl=tk.BooleanVar(); self.check=tk.BooleanVar()
+
+        self._build(); self.after(PUMP_MS,self._pump)
 
     # ───── build UI ─────
     def _build(self):
@@ -192,9 +101,10 @@ class MigrationGUI(tk.Tk):
                              command=lambda:self._pick(self.multi_csv))
         self.lab_csv=tk.Label(left,textvariable=self.multi_csv)
 
-        tk.Button(left,text="START",bg="#3a9",fg="white",
-                  command=self._start,padx=20
-                 ).grid(row=r,column=0,columnspan=2,pady=8); r+=1
+        btns=tk.Frame(left); btns.grid(row=r,column=0,columnspan=2,pady=8); r+=1
+        tk.Button(btns,text="START",bg="#3a9",fg="white",
+                  command=self._start,padx=20).pack(side="left",padx=4)
+        tk.Button(btns,text="APPLY PLAN…",command=self._apply).pack(side="left",padx=4)
         self.log=scrolledtext.ScrolledText(left,width=100,height=28)
         self.log.grid(row=r,column=0,columnspan=2,pady=6)
 
@@ -212,15 +122,21 @@ class MigrationGUI(tk.Tk):
         sub_grp = add_row(self.v_group,"Groups")
         tk.Label(sub_grp,text="Exclude:").pack(side="left")
         ent_ex=tk.Entry(sub_grp,textvariable=self.exclude,width=18); ent_ex.pack(side="left")
+        tk.Checkbutton(sub_grp,text="Sync (diff, batched)",
+                       variable=self.group_sync).pack(side="left")
 
         sub_fil = add_row(self.v_filter,"Filters")
         btn_fil=tk.Button(sub_fil,text="Filter CSV",command=lambda:self._pick(self.filter_csv))
         btn_fil.pack(side="left")
         tk.Label(sub_fil,textvariable=self.filter_csv,width=26,anchor="w").pack(side="left")
+        tk.Checkbutton(sub_fil,text="Discover via API (needs /filter/search)",
+                       variable=self.filter_discover).pack(side="left")
 
         sub_iss = add_row(self.v_issue,"Issues (assignee/reporter)")
         tk.Checkbutton(sub_iss,text="Unresolved only",
                        variable=self.issue_unres).pack(side="left")
+        tk.Checkbutton(sub_iss,text="Batch all pairs",
+                       variable=self.issue_batch).pack(side="left")
 
         sub_role= add_row(self.v_roles,"Roles")
         btn_role=tk.Button(sub_role,text="Roles CSV",command=lambda:self._pick(self.roles_csv))
@@ -235,6 +151,20 @@ class MigrationGUI(tk.Tk):
         tk.Checkbutton(sub_multi,text="Unresolved only",
                        variable=self.multi_unres).pack(side="left")
 
+        tk.Label(right,text="Run",
+                 font=("Segoe UI",11,"bold")).pack(anchor="w",pady=(12,4))
+        run=tk.Frame(right); run.pack(anchor="w",fill="x")
+        tk.Label(run,text="Parallel pairs").grid(row=0,column=0,sticky="e")
+        tk.Spinbox(run,from_=1,to=32,textvariable=self.workers,width=5).grid(row=0,column=1,sticky="w")
+        tk.Label(run,text="Max in-flight requests").grid(row=1,column=0,sticky="e")
+        tk.Spinbox(run,from_=1,to=64,textvariable=self.in_flight,width=5).grid(row=1,column=1,sticky="w")
+        tk.Label(run,text="Resume run id").grid(row=2,column=0,sticky="e")
+        tk.Entry(run,textvariable=self.run_id,width=18).grid(row=2,column=1,sticky="w")
+        tk.Checkbutton(run,text="JSONL log (Logs/run-<time>.jsonl)",
+                       variable=self.jsonl).grid(row=3,column=0,columnspan=2,sticky="w")
+        tk.Checkbutton(run,text="Apply: re-check filters/issues first",
+                       variable=self.check).grid(row=4,column=0,columnspan=2,sticky="w")
+
         # keep for enable/disable
         self.sub_pairs=[
             (self.v_group,[ent_ex]),
@@ -276,56 +206,69 @@ class MigrationGUI(tk.Tk):
         if self.multi_mode.get():
             if not os.path.isfile(self.multi_csv.get()):
                 messagebox.showerror("CSV","Select CSV"); return
-            with open(self.multi_csv.get(),newline='',encoding="utf-8-sig") as f:
-                for r in csv.reader(f):
-                    if len(r)<2 or r[0].lower().startswith("source"): continue
-                    pairs.append((r[0].strip(),r[1].strip()))
+            pairs=read_pairs(self.multi_csv.get())
         else:
             if not (self.src.get() and self.tgt.get()):
                 messagebox.showerror("Missing","source / target"); return
             pairs=[(self.src.get().strip(),self.tgt.get().strip())]
-        threading.Thread(target=self._worker,args=(pairs,),daemon=True).start()
+        if not self._run_opts_ok(): return
+        threading.Thread(target=self._worker,args=(pairs,self._options()),daemon=True).start()
         ROOT.info("thread started for %d pair(s)",len(pairs))
 
+    def _apply(self):
+        if not (self.adm.get() and self.pw.get()):
+            messagebox.showerror("Missing","admin / password"); return
+        if not self._run_opts_ok(): return
+        p=filedialog.askopenfilename(initialdir=self.logs_dir,filetypes=[("Change plan","*.jsonl")])
+        if not p: return
+        threading.Thread(target=self._apply_worker,args=(p,self._options()),daemon=True).start()
+        ROOT.info("applying change plan %s",p)
+
+    def _run_opts_ok(self):
+        """The Run spinboxes hold whole numbers ≥ 1 (IntVar.get raises TclError on text)."""
+        for lbl,var in (("Parallel pairs",self.workers),("Max in-flight requests",self.in_flight)):
+            try: ok=var.get()>=1
+            except tk.TclError: ok=False
+            if not ok: messagebox.showerror(lbl,"whole number ≥ 1"); return False
+        return True
+
+    def _apply_worker(self,path,o):
+        try: apply_plan(path,o)
+        except (OSError,ValueError) as e: ROOT.error("plan not applied: %s",e)
+
     # ───── background migration ─────
-    def _worker(self,pairs):
-        sess=requests.Session(); sess.auth=(self.adm.get(),self.pw.get()); sess.verify=False
-        for src,tgt in pairs:
-            fh=logging.FileHandler(os.path.join(self.logs_dir,f"{src}.log"),
-                                   mode="a",encoding="utf-8"); fh.setFormatter(FMT)
-            ROOT.addHandler(fh)
-            ROOT.info("=== %s → %s (%s UTC) ===",src,tgt,datetime.now(timezone.utc).strftime('%H:%M:%S'))
-
-            if self.v_group.get():
-                migr_groups(self.url.get(),self.adm.get(),self.pw.get(),
-                            src,tgt,self.exclude.get(),self.dry.get())
-            if self.v_filter.get():
-                migr_filters(self.url.get(),self.adm.get(),self.pw.get(),
-                             self.filter_csv.get(),src,tgt,self.dry.get())
-            if self.v_issue.get():
-                migr_issues(self.url.get(),self.adm.get(),self.pw.get(),
-                            src,tgt,self.issue_unres.get(),self.dry.get())
-            if self.v_roles.get():
-                fast_roles(sess,self.url.get(),self.roles_csv.get(),
-                           src,tgt,self.dry.get())
-            if self.v_single.get():
-                single_picker(sess,self.url.get(),src,tgt,
-                              self.single_unres.get(),self.dry.get())
-            if self.v_multi.get():
-                multi_picker(sess,self.url.get(),src,tgt,
-                             self.multi_unres.get(),self.dry.get())
-
-            ROOT.info("done (%s)",datetime.now(timezone.utc).strftime('%H:%M:%S'))
-            ROOT.removeHandler(fh); fh.close()
-        ROOT.info("ALL completed")
+    def _options(self):
+        """Snapshot of the form, taken on the Tk thread for the worker threads."""
+        return {"url":self.url.get(),"adm":self.adm.get(),"pw":self.pw.get(),"dry":self.dry.get(),
+                "groups":self.v_group.get(),"exclude":self.exclude.get(),
+                "group_sync":self.group_sync.get(),
+                "filters":self.v_filter.get(),"filter_csv":self.filter_csv.get(),
+                "filter_discover":self.filter_discover.get(),
+                "issues":self.v_issue.get(),"issue_unres":self.issue_unres.get(),
+                "issue_batch":self.issue_batch.get(),
+                "roles":self.v_roles.get(),"roles_csv":self.roles_csv.get(),
+                "single":self.v_single.get(),"single_unres":self.single_unres.get(),
+                "multi":self.v_multi.get(),"multi_unres":self.multi_unres.get(),
+                "workers":self.workers.get(),"in_flight":self.in_flight.get(),
+                "run_id":self.run_id.get().strip(),"check":self.check.get(),
+                "jsonl":os.path.join(self.logs_dir,f"run-{datetime.now():%Y%m%d-%H%M%S}.jsonl")
+                        if self.jsonl.get() else ""}
+
+    def _worker(self,pairs,o):
+        run_pairs(pairs,o)
 
     # ───── queue pump ─────
     def _pump(self):
+        lines=[]
         try:
-            while True:
-                self.log.insert("end",queue_handler.q.get_nowait()+"\n"); self.log.see("end")
-        except queue.Empty: pass
-        self.after(200,self._pump)
+            while True: lines.append(queue_handler.q.popleft())
+        except IndexError: pass
+        if lines:
+            self.log.insert("end","\n".join(lines)+"\n")
+            excess=int(self.log.index("end-1c").split(".")[0])-1-LOG_LINES
+            if excess>0: self.log.delete("1.0",f"{excess+1}.0")
+            self.log.see("end")
+        self.after(PUMP_MS,self._pump)
 
 # ─────────────────────────────────────────────
 if __name__=="__main__":
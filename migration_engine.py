@@ -0,0 +1,882 @@
+#!/usr/bin/env python3
+"""
+Jira DC migration engine  ·  headless core of the Migration GUI
+────────────────────────────────────────────────────────────────
+• All Jira helpers (groups, filters, issues, roles, user-pickers) and the pair
+  scheduler, with no tkinter import – used by the GUI and by migrate_cli.py
+• Options are a plain dict (see DEFAULTS); run_pairs() returns a result dict
+• Logs/ per-user logs and metrics-<time>.txt/.prom, Cache/ field list + journal
+• A dry run compiles a change plan (Logs/plan-<time>.jsonl, see change_plan.py);
+  apply_plan() writes it later without repeating the reads
+"""
+
+import os, sys, csv, json, time, hashlib, threading, logging, contextvars, collections, urllib3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http_transport import new_session, set_host_limit, add_member, MAX_IN_FLIGHT, POOL_SIZE
+from journal import Journal
+from metrics import Metrics
+from change_plan import ChangePlan, diff_line, merge_user_lists
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# ──────────────── logging set-up ────────────────
+ROOT = logging.getLogger()
+ROOT.setLevel(logging.INFO)
+FMT = logging.Formatter("%(asctime)s %(levelname)s - %(message)s")
+
+def log_to_stdout(fmt=None):
+    h=logging.StreamHandler(sys.stdout)
+    if fmt: h.setFormatter(fmt)
+    ROOT.addHandler(h); return h
+
+# every record carries the (source, target) pair its thread is working on,
+# so per-user log files only see their own pair when pairs run in parallel
+current_pair=contextvars.ContextVar("current_pair",default=None)
+_record_factory=logging.getLogRecordFactory()
+def _pair_record(*a,**kw):
+    rec=_record_factory(*a,**kw); rec.pair=current_pair.get(); return rec
+logging.setLogRecordFactory(_pair_record)
+
+class JsonlHandler(logging.FileHandler):
+    """One JSON object per record (ts, level, logger, pair, msg) for post-processing runs."""
+    def __init__(self,path): super().__init__(path,mode="a",encoding="utf-8")
+    def format(self,rec):
+        return json.dumps({"ts":datetime.fromtimestamp(rec.created,timezone.utc).isoformat(timespec="milliseconds"),
+                           "level":rec.levelname,"logger":rec.name,
+                           "pair":list(rec.pair) if getattr(rec,"pair",None) else None,
+                           "msg":rec.getMessage()},ensure_ascii=False)
+
+class PairFilter(logging.Filter):
+    def __init__(self,pair): super().__init__(); self.pair=pair
+    def filter(self,rec): return getattr(rec,"pair",None)==self.pair
+
+class PairLogs(logging.Handler):
+    """Routes records to Logs/<source>.log by their pair, for the cross-pair
+    steps (group sync, issue writes, plan apply) that run outside run_pair."""
+    def __init__(self): super().__init__(); self.files={}
+    def emit(self,rec):
+        pair=getattr(rec,"pair",None)
+        if not pair: return
+        fh=self.files.get(pair[0])
+        if fh is None:
+            fh=self.files[pair[0]]=logging.FileHandler(os.path.join(ensure_log_dir(),f"{pair[0]}.log"),
+                                                       mode="a",encoding="utf-8")
+            fh.setFormatter(FMT)
+        fh.handle(rec)
+    def close(self):
+        for fh in self.files.values(): fh.close()
+        super().close()
+
+@contextmanager
+def pair_logs():
+    """PairLogs attached to the root logger for the duration of the block."""
+    h=PairLogs(); ROOT.addHandler(h)
+    try: yield h
+    finally: ROOT.removeHandler(h); h.close()
+
+def log_pairs(lg,pairs,level,msg,*a):
+    """Log once per (source, target) in pairs, so the line reaches each source's
+    log; once without a pair if there are none."""
+    for p in pairs or (None,):
+        token=current_pair.set(tuple(p) if p else None)
+        try: lg.log(level,msg,*a)
+        finally: current_pair.reset(token)
+
+LOG_DIR=None   # Logs/ next to this file unless set (bench_migration points it at its scratch dir)
+
+def ensure_log_dir():
+    path=LOG_DIR or os.path.join(os.path.dirname(os.path.abspath(__file__)),"Logs")
+    os.makedirs(path,exist_ok=True); return path
+
+def ensure_cache_dir():
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)),"Cache")
+    os.makedirs(path,exist_ok=True); return path
+
+# ─────────────── Jira helper functions ───────────────
+def add_group_user(s,base,group,user):
+    """Add user to a Jira group (http_transport.add_member); (ok, status)."""
+    def is_member():
+        r=s.get(f"{base}/rest/api/2/user",params={"username":user,"expand":"groups"})
+        return r.status_code==200 and any(g.get("name")==group for g in r.json()["groups"]["items"])
+    return add_member(s,f"{base}/rest/api/2/group/user",is_member,params={"groupname":group},json={"name":user})
+
+def migr_groups(s,base,src,tgt,exclude,dry,journal=None,plan=None):
+    lg=logging.getLogger("groups")
+    skip={g.strip() for g in exclude.split(",") if g.strip()}
+    r=s.get(f"{base}/rest/api/2/user",params={"username":src,"expand":"groups"})
+    if r.status_code!=200: lg.error("groups fetch %s %s",r.status_code,r.text[:120]); return
+    for g in r.json()["groups"]["items"]:
+        name=g["name"]
+        if name in skip: lg.info("skip group %s",name); continue
+        if dry:
+            if plan is not None: plan.add("group",src=src,tgt=tgt,group=name,before=None,after=True)
+            lg.info("[dry] add %s→%s",tgt,name); continue
+        if journal and not journal.begin("groups",src,tgt,name): lg.info("journal: %s already done",name); continue
+        ok,status=add_group_user(s,base,name,tgt)
+        if journal: journal.record("groups",src,tgt,name,ok,status)
+        lg.log(logging.INFO if ok else logging.ERROR,"%s → %s (%s)",name,tgt,status)
+
+def user_groups(s,base,user):
+    """Set of group names of a Jira user."""
+    r=s.get(f"{base}/rest/api/2/user",params={"username":user,"expand":"groups"})
+    if r.status_code!=200: raise RuntimeError(f"groups fetch {user}: {r.status_code} {r.text[:120]}")
+    return {g["name"] for g in r.json()["groups"]["items"]}
+
+def plan_groups(s,base,pairs,exclude,workers=4):
+    """{group: {target: source}} of the adds missing for every pair: source and
+    target memberships are fetched once per distinct user and diffed.
+    Returns (plan, [[src, tgt, error]] of the pairs whose users could not be fetched)."""
+    lg=logging.getLogger("groups")
+    skip={g.strip() for g in exclude.split(",") if g.strip()}
+    users=sorted({u for p in pairs for u in p})
+    with ThreadPoolExecutor(max_workers=max(1,workers)) as pool:
+        futs={u:pool.submit(user_groups,s,base,u) for u in users}
+    member,errors={},{}
+    for u,f in futs.items():
+        try: member[u]=f.result()
+        except Exception as e: errors[u]=str(e)
+    plan,failed={},[]
+    for src,tgt in pairs:
+        err="; ".join(errors[u] for u in (src,tgt) if u in errors)
+        if err:
+            log_pairs(lg,[(src,tgt)],logging.ERROR,"group sync skipped: %s",err)
+            failed.append([src,tgt,f"groups: {err}"]); continue
+        for g in sorted(member[src]-member[tgt]-skip): plan.setdefault(g,{}).setdefault(tgt,src)
+    lg.info("group sync: %d add(s) across %d group(s) for %d pair(s), %d failed",
+            sum(map(len,plan.values())),len(plan),len(pairs),len(failed))
+    return plan,failed
+
+def apply_group_plan(s,base,plan,dry,journal=None,workers=4,changes=None):
+    """Run a plan_groups() plan, one task per group, groups in parallel; each add
+    is logged under its pair.  A dry run adds the writes to changes (a ChangePlan)
+    if given.  Returns [[src, tgt, error]] of the pairs with an add that raised
+    or was refused."""
+    lg=logging.getLogger("groups")
+    failed={}   # (src, tgt) → first error
+    def add(g,src,tgt):
+        if dry:
+            if changes is not None: changes.add("group",src=src,tgt=tgt,group=g,before=False,after=True)
+            lg.info("[dry] add %s→%s",tgt,g); return
+        if journal and not journal.begin("groups",src,tgt,g): return
+        ok,status=add_group_user(s,base,g,tgt)
+        if journal: journal.record("groups",src,tgt,g,ok,status)
+        lg.log(logging.INFO if ok else logging.ERROR,"%s → %s (%s)",g,tgt,status)
+        if not ok: failed.setdefault((src,tgt),f"groups: {g}: {status}")
+    def add_all(g,targets):
+        for tgt,src in targets.items():
+            token=current_pair.set((src,tgt))
+            try: add(g,src,tgt)
+            except Exception as e: lg.error("%s → %s: %s",g,tgt,e); failed.setdefault((src,tgt),f"groups: {g}: {e}")
+            finally: current_pair.reset(token)
+    with ThreadPoolExecutor(max_workers=max(1,workers)) as pool:
+        for fut in [pool.submit(add_all,g,t) for g,t in sorted(plan.items())]:
+            try: fut.result()
+            except Exception as e: lg.error("group: %s",e)
+    return [[*p,e] for p,e in failed.items()]
+
+FILTER_WORKERS=4  # filter GET/PUT round-trips in flight per pair
+
+class FilterIndex:
+    """owner → [filter id] read once from the filter CSV (filter_id,owner,...)."""
+    def __init__(self,by_owner): self.by_owner=by_owner
+    def __len__(self): return len(self.by_owner)
+    def lookup(self,owner): return self.by_owner.get(owner,())
+
+    @classmethod
+    def load(cls,fcsv):
+        by_owner={}
+        with open(fcsv,newline='',encoding="utf-8-sig") as f:
+            for fid,owner,*_ in csv.reader(f): by_owner.setdefault(owner,[]).append(fid)
+        return cls(by_owner)
+
+FILTER_SEARCH="/rest/api/2/filter/search"   # owner search: Jira Cloud API, absent from Jira DC REST v2
+
+def filter_search_available(s,base):
+    """True if the Jira answers FILTER_SEARCH; Jira DC does not, use a filter CSV there."""
+    return s.get(f"{base}{FILTER_SEARCH}",params={"maxResults":1}).status_code==200
+
+def discover_filters(s,base,owner):
+    """Ids of the filters owned by owner, found through FILTER_SEARCH (paged on total)."""
+    ids,start=[],0
+    while True:
+        r=s.get(f"{base}{FILTER_SEARCH}",params={"owner":owner,"startAt":start,"maxResults":100})
+        if r.status_code!=200: raise RuntimeError(f"filter search {owner}: {r.status_code} {r.text[:120]}")
+        d=r.json(); vals=d.get("values",[])
+        ids+=[str(v["id"]) for v in vals]
+        start+=len(vals)
+        if not vals or start>=d.get("total",float("inf")): return ids
+
+def submit_ctx(pool,fn,*a):
+    """pool.submit keeping the caller's context (current pair for the log files)."""
+    return pool.submit(contextvars.copy_context().run,fn,*a)
+
+def migr_filters(s,base,fcsv,src,tgt,dry,journal=None,index=None,discover=False,workers=FILTER_WORKERS,plan=None):
+    """Give tgt every filter of src.  Returns ["<id> (<status or error>)"] of the
+    filters that could not be read or written."""
+    lg=logging.getLogger("filters")
+    if discover:
+        try: fids=discover_filters(s,base,src)
+        except RuntimeError as e: lg.error("%s",e); raise
+    else:
+        if index is None:
+            if not os.path.isfile(fcsv): lg.error("filter CSV missing: %s",fcsv); return [f"CSV missing: {fcsv}"]
+            index=FilterIndex.load(fcsv)
+        fids=index.lookup(src)
+    def move(fid):
+        """None, or "<id> (<status>)" if the filter could not be read or written."""
+        url=f"{base}/rest/api/2/filter/{fid}"
+        if dry:
+            if plan is not None:   # the plan carries the PUT body, so the apply needs no GET
+                r=s.get(url)
+                if r.status_code!=200: lg.error("filter %s: %s",fid,r.status_code); return f"{fid} ({r.status_code})"
+                data=r.json()
+                plan.add("filter",src=src,tgt=tgt,id=fid,before={"owner":(data.get("owner") or {}).get("name")},
+                         after={"owner":tgt},body={**data,"owner":{"name":tgt}})
+            lg.info("[dry] filter %s owner→%s",fid,tgt); return
+        if journal and not journal.begin("filters",src,tgt,fid): lg.info("journal: filter %s already done",fid); return
+        r=s.get(url)
+        if r.status_code==200:
+            data=r.json(); data["owner"]={"name":tgt}
+            r=s.put(url,params={"overrideSharePermissions":"true"},json=data)
+        if journal: journal.record("filters",src,tgt,fid,r.ok,r.status_code)
+        lg.log(logging.INFO if r.ok else logging.ERROR,"filter %s status %s",fid,r.status_code)
+        if not r.ok: return f"{fid} ({r.status_code})"
+    failed=[]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for fid,fut in [(fid,submit_ctx(pool,move,fid)) for fid in fids]:
+            try: err=fut.result()
+            except Exception as e: lg.error("filter %s: %s",fid,e); err=f"{fid} ({e!r})"
+            if err: failed.append(err)
+    return failed
+
+# ─────────────── per-issue change planner ───────────────
+def _user_ref(v):
+    """A user / user-list field value reduced to the {"name": ...} form the PUTs send."""
+    if isinstance(v,list): return [{"name":u["name"]} for u in v]
+    return {"name":v["name"]} if v else None
+
+class IssuePlanner:
+    """Collects field edits per issue from every feature and sends them as one PUT per issue.
+    The value each field had when first read is kept as its before value for change plans,
+    and the (source, target) pairs behind each issue's edits for the per-user logs."""
+    def __init__(self):
+        self.fields={}; self.before={}; self.pairs={}; self.refused={}; self.lock=threading.Lock()
+    def __len__(self): return len(self.fields)
+    def update(self,key,upd,before=None,pairs=None):
+        """pairs defaults to the pair of the calling thread (current_pair)."""
+        if pairs is None: pairs={current_pair.get()}-{None}
+        with self.lock:
+            self.fields.setdefault(key,{}).update(upd)
+            b=self.before.setdefault(key,{})
+            for f,v in (before or {}).items(): b.setdefault(f,v)
+            self.pairs.setdefault(key,set()).update(pairs)
+
+    def swap_user(self,key,fid,current,src,tgt):
+        """Replace src with tgt in a multi-user field, on top of any edit already planned for it."""
+        with self.lock:
+            self.before.setdefault(key,{}).setdefault(fid,_user_ref(current or []))
+            self.pairs.setdefault(key,set()).add((src,tgt))
+            upd=self.fields.setdefault(key,{})
+            names=[u["name"] for u in (upd[fid] if fid in upd else current or [])]
+            names=[n for n in names if n!=src]
+            if tgt not in names: names.append(tgt)
+            upd[fid]=[{"name":n} for n in names]
+
+    def export(self):
+        """{key: {"fields", "before", "pairs"}} of the planned edits, for absorb()
+        in another process."""
+        with self.lock:
+            return {k:{"fields":u,"before":self.before.get(k,{}),
+                       "pairs":sorted(map(list,self.pairs.get(k,())))} for k,u in self.fields.items()}
+
+    def absorb(self,edits):
+        """Merge another planner's export(), e.g. a CLI shard's; a multi-user
+        list both planned to edit is combined with merge_user_lists.  A scalar
+        field (assignee, reporter, single picker) planned with different users
+        has no single target: the issue is refused (dropped, here and in any
+        later export).  Returns [[src, tgt, error]] of the refused issues' pairs."""
+        failed=[]
+        with self.lock:
+            for key,e in edits.items():
+                upd=self.fields.get(key,{})
+                clash=[f for f,v in e["fields"].items() if f in upd and not isinstance(v,list)
+                       and not isinstance(upd[f],list) and not _same(upd[f],v)]
+                if clash or key in self.refused:
+                    pairs=self.pairs.pop(key,set())|set(map(tuple,e["pairs"]))
+                    self.fields.pop(key,None); self.before.pop(key,None)
+                    err=self.refused.setdefault(key,f"issues: {key} {', '.join(clash)} planned for more than one target")
+                    failed+=[[src,tgt,err] for src,tgt in sorted(pairs)]; continue
+                upd=self.fields.setdefault(key,{}); before=self.before.setdefault(key,{})
+                for f,v in e["before"].items(): before.setdefault(f,v)
+                for f,v in e["fields"].items():
+                    if isinstance(v,list) and isinstance(upd.get(f),list): v=merge_user_lists(before.get(f),upd[f],v)
+                    upd[f]=v
+                self.pairs.setdefault(key,set()).update(map(tuple,e["pairs"]))
+        return failed
+
+    def flush(self,s,base,dry,journal=None,plan=None):
+        """PUT every planned issue; a dry run adds them to plan instead, if given."""
+        lg=logging.getLogger("planner")
+        with self.lock:
+            todo,before,pairs=self.fields,self.before,self.pairs
+            self.fields,self.before,self.pairs={},{},{}
+        if dry and plan is not None:
+            for key,upd in todo.items():
+                plan.add("issue",key=key,before=before.get(key,{}),after=upd,
+                         pairs=sorted(map(list,pairs.get(key,()))))
+        _put_issues(s,base,[(k,u,before.get(k,{}),pairs.get(k,())) for k,u in todo.items()],dry,lg,
+                    journal=journal)
+        lg.info("%d issue PUT(s)",len(todo))
+
+JQL_MAX=4000      # chars per batched JQL list (POSTed, but Jira caps JQL length); the issues
+                  # batch puts its user list in twice, so its JQL runs to about 2×JQL_MAX
+JQL_MAX_USERS=200 # items per batched JQL list
+
+def jql_str(v): return '"%s"'%v.replace("\\","\\\\").replace('"','\\"')
+
+def jql_chunks(parts,limit=JQL_MAX,max_items=JQL_MAX_USERS,sep=","):
+    """Split rendered JQL parts into lists whose sep-joined form stays under limit."""
+    chunk,size=[],0
+    for p in parts:
+        w=len(p)+len(sep)
+        if chunk and (size+w>limit or len(chunk)>=max_items): yield chunk; chunk,size=[],0
+        chunk.append(p); size+=w
+    if chunk: yield chunk
+
+class SearchError(RuntimeError):
+    """A search Jira refused; status 400 means it rejected the JQL itself
+    (e.g. a user name or custom field it does not know)."""
+    def __init__(self,msg,status): super().__init__(msg); self.status=status
+
+def search_issues(s,base,jql,fields,lg,page=100):
+    """Yield every issue matching jql, paging with startAt until exhausted.
+    Raises SearchError on a non-200 answer."""
+    start=0
+    while True:
+        r=s.post(f"{base}/rest/api/2/search",
+                 json={"jql":jql,"startAt":start,"maxResults":page,"fields":fields})
+        if r.status_code!=200: raise SearchError(f"search {r.status_code}: {r.text[:200]}",r.status_code)
+        d=r.json(); issues=d["issues"]
+        if not issues: return
+        yield from issues
+        start+=len(issues)
+        if start>=d["total"]: return
+
+def _user_updates(it,mapping):
+    """(key, assignee/reporter edits, their before values, their pairs) for an
+    issue given a source→target map; the edits are empty if none of its users is mapped."""
+    upd,pairs={},set()
+    for fld in ("assignee","reporter"):
+        v=it["fields"][fld]
+        if v and v["name"] in mapping:
+            upd[fld]={"name":mapping[v["name"]]}; pairs.add((v["name"],mapping[v["name"]]))
+    return it["key"],upd,{f:_user_ref(it["fields"][f]) for f in upd},pairs
+
+def issue_oid(key,upd):
+    """Journal object id of an issue write: the key plus a digest of the fields
+    sent, so a later edit of the same issue in a resumed run is not taken as done."""
+    return "%s#%s"%(key,hashlib.sha1(json.dumps(upd,sort_keys=True).encode()).hexdigest()[:12])
+
+def _put_issues(s,base,updates,dry,lg,planner=None,journal=None):
+    """One PUT per (key, fields, before, pairs), or hand them to planner.  Issues
+    are journalled without a pair (issue_oid) since the planner merges the edits
+    of several pairs; each write is logged under every pair behind it."""
+    if planner is not None:
+        for key,upd,before,pairs in updates: planner.update(key,upd,before,pairs)
+        lg.info("%d issue(s) planned",len(updates)); return
+    updates=list(updates)
+    if journal and not dry:
+        updates=[u for u in updates if not journal.done("issue","","",issue_oid(*u[:2]))]
+        journal.plan_many("issue",[("","",issue_oid(*u[:2])) for u in updates])
+    for key,upd,_,pairs in updates:
+        if dry: log_pairs(lg,pairs,logging.INFO,"[dry] issue %s: %s",key,", ".join(sorted(upd))); continue
+        try:
+            r=s.put(f"{base}/rest/api/2/issue/{key}?notifyUsers=false",
+                    json={"fields":upd},
+                    headers={"Content-Type":"application/json"})
+            ok,status=r.ok,r.status_code
+        except Exception as e: ok,status=False,repr(e)
+        if journal: journal.record("issue","","",issue_oid(key,upd),ok,status)
+        log_pairs(lg,pairs,logging.INFO if ok else logging.ERROR,"issue %s: %s (%s)",
+                  key,", ".join(sorted(upd)),status)
+
+def migr_issues(s,base,src,tgt,unres,dry,planner=None,journal=None):
+    lg=logging.getLogger("issues")
+    jql=f'(assignee={jql_str(src)} OR reporter={jql_str(src)})'
+    if unres: jql+=' AND resolution=Unresolved'
+    # collect before writing: updated issues drop out of the result set and would shift startAt
+    updates=[u for it in search_issues(s,base,jql,["assignee","reporter"],lg)
+             if (u:=_user_updates(it,{src:tgt}))[1]]
+    _put_issues(s,base,updates,dry,lg,planner,journal)
+
+def refuse_multi_targets(lg,pairs,what):
+    """[[src, tgt, error]] of the pairs whose source is listed with more than one
+    target, each logged at ERROR: the edits named by what (e.g. "issues") of
+    such a source have no single target."""
+    targets=collections.defaultdict(set)
+    for src,tgt in pairs: targets[src].add(tgt)
+    failed=[]
+    for src,tgt in dict.fromkeys(pairs):
+        if len(targets[src])<2: continue
+        log_pairs(lg,[(src,tgt)],logging.ERROR,"%s is mapped to %s – its %s are left alone",
+                  src,", ".join(sorted(targets[src])),what)
+        failed.append([src,tgt,f"{what}: {src} is mapped to {len(targets[src])} targets"])
+    return failed
+
+def migr_issues_batch(s,base,pairs,unres,dry,planner=None,journal=None):
+    """migr_issues for many pairs at once: one search per chunk of sources,
+    each issue routed to its target through the source→target map.
+    Jira rejects a whole JQL (400) for one name it does not know, so such a
+    chunk is bisected down to the rejected sources; any other search error
+    fails the chunk.  A source listed with more than one target is left out
+    (its issues have no single target).  Returns [[src, tgt, error]] of the
+    pairs not searched."""
+    lg=logging.getLogger("issues")
+    failed=refuse_multi_targets(lg,pairs,"issues")
+    multi={src for src,_,_ in failed}
+    mapping={src:tgt for src,tgt in pairs if src not in multi}
+    name_of={jql_str(n):n for n in mapping}.get
+    updates=[]
+    def search(chunk):
+        users=",".join(chunk)
+        jql=f'(assignee in ({users}) OR reporter in ({users}))'
+        if unres: jql+=' AND resolution=Unresolved'
+        try:
+            return [u for it in search_issues(s,base,jql,["assignee","reporter"],lg)
+                    if (u:=_user_updates(it,mapping))[1]]
+        except SearchError as e:
+            if e.status==400 and len(chunk)>1:
+                return search(chunk[:len(chunk)//2])+search(chunk[len(chunk)//2:])
+            bad=[(n,mapping[n]) for n in map(name_of,chunk)]
+            log_pairs(lg,bad,logging.ERROR,"batched search: %s",e)
+            failed.extend([src,tgt,f"issues: {e}"] for src,tgt in bad); return []
+    for chunk in jql_chunks([jql_str(n) for n in sorted(mapping)]):
+        updates+=search(chunk)
+    lg.info("batched search: %d issue(s) for %d source(s), %d failed",len(updates),len(mapping),len(failed))
+    _put_issues(s,base,updates,dry,lg,planner,journal)
+    return failed
+
+class RoleIndex:
+    """username → [(project_key, role_name, role_url)] built once from the roles CSV,
+    plus the sheet's members of each (project_key, role_name).
+    A JSON copy is kept next to the sheet (<csv>.idx) and reused for as long
+    as the sheet's size and mtime are unchanged (JSON, not pickle: the sheet
+    often sits on a shared drive and loading must not run code)."""
+    def __init__(self,by_user,members=None): self.by_user=by_user; self.members=members or {}
+    def __len__(self): return len(self.by_user)
+    def lookup(self,user): return self.by_user.get(user,())
+    def has(self,pkey,rname,user): return user in self.members.get((pkey,rname),())
+
+    @classmethod
+    def load(cls,rcsv):
+        st=os.stat(rcsv); sig=[st.st_size,st.st_mtime_ns]; cache=rcsv+".idx"
+        try:
+            with open(cache,encoding="utf-8") as f: c=json.load(f)
+            if c["sig"]==sig:
+                return cls({u:[tuple(e) for e in ents] for u,ents in c["by_user"].items()},
+                           {(p,r):frozenset(names) for p,r,names in c["members"]})
+        except (OSError,ValueError,KeyError,TypeError): pass
+        by_user,members={},{}
+        with open(rcsv,newline='',encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                ent=(row["project_key"],row["role_name"],row["role_url"])
+                names={n for n in row["usernames"].split(";") if n}
+                members[ent[:2]]=frozenset(names)
+                for name in names: by_user.setdefault(name,[]).append(ent)
+        tmp=f"{cache}.{os.getpid()}.tmp"   # CLI shards load the same sheet at once
+        try:
+            with open(tmp,"w",encoding="utf-8") as f:
+                json.dump({"sig":sig,"by_user":by_user,
+                           "members":[[p,r,sorted(names)] for (p,r),names in members.items()]},f)
+            os.replace(tmp,cache)
+        except OSError: pass
+        return cls(by_user,members)
+
+def add_role_user(sess,rurl,user):
+    """Add user to the project role at rurl (http_transport.add_member); (ok, status)."""
+    def is_member():
+        r=sess.get(rurl)
+        return r.status_code==200 and any(a.get("type")=="atlassian-user-role-actor" and a.get("name")==user
+                                          for a in r.json().get("actors",[]))
+    return add_member(sess,rurl,is_member,json={"user":[user]})
+
+def fast_roles(sess,base,rcsv,src,tgt,dry,index=None,journal=None,plan=None):
+    lg=logging.getLogger("roles")
+    if index is None:
+        if not os.path.isfile(rcsv): lg.error("roles CSV missing: %s",rcsv); return
+        index=RoleIndex.load(rcsv)
+    for pkey,rname,rurl in index.lookup(src):
+        # same check live and dry, so a plan and a live run of a job agree
+        if index.has(pkey,rname,tgt): lg.info("role %s/%s: %s already in it",pkey,rname,tgt); continue
+        if dry:
+            if plan is not None:
+                plan.add("role",src=src,tgt=tgt,project=pkey,role=rname,url=rurl,before=False,after=True)
+            lg.info("[dry] role %s/%s",pkey,rname); continue
+        if journal and not journal.begin("roles",src,tgt,f"{pkey}/{rname}"): lg.info("journal: %s/%s already done",pkey,rname); continue
+        ok,status=add_role_user(sess,rurl,tgt)
+        if journal: journal.record("roles",src,tgt,f"{pkey}/{rname}",ok,status)
+        lg.log(logging.INFO if ok else logging.ERROR,"%s/%s → %s (%s)",pkey,rname,tgt,status)
+
+FIELD_TTL=6*3600   # seconds a cached /field list stays valid
+
+class FieldRegistry:
+    """Jira field list fetched once per run, indexed by custom type suffix and
+    persisted to Cache/fields-<sha1 of the base URL, 12 hex digits>.json so later
+    sessions reuse it until FIELD_TTL."""
+    def __init__(self,fields):
+        self.fields=fields; self.by_type={}
+        for f in fields:
+            if f.get("custom"): self.by_type.setdefault(f["schema"]["custom"].rsplit(":",1)[-1],[]).append(f)
+
+    def of_type(self,suffix):
+        """Custom fields whose schema type ends with :suffix (e.g. "userpicker")."""
+        return self.by_type.get(suffix.lstrip(":"),[])
+
+    @classmethod
+    def load(cls,sess,base,ttl=FIELD_TTL):
+        path=os.path.join(ensure_cache_dir(),"fields-%s.json"%hashlib.sha1(base.encode()).hexdigest()[:12])
+        try:
+            if time.time()-os.path.getmtime(path)<ttl:
+                with open(path,encoding="utf-8") as f: return cls(json.load(f))
+        except (OSError,ValueError): pass
+        r=sess.get(f"{base}/rest/api/2/field"); r.raise_for_status()
+        fields=r.json()
+        try:
+            tmp=f"{path}.{os.getpid()}.tmp"   # CLI shards load the list at once
+            with open(tmp,"w",encoding="utf-8") as f: json.dump(fields,f)
+            os.replace(tmp,path)
+        except OSError: pass
+        return cls(fields)
+
+def migr_pickers(sess,base,src,tgt,single,multi,dry,planner=None,registry=None,journal=None,plan=None):
+    """Swap src for tgt in every single- and multi-user picker field.
+
+    single/multi are None to skip that kind of picker, else its "unresolved
+    only" flag.  All picker fields are ORed into as few JQLs as the length
+    cap allows, requesting only those field ids, and the paged results feed
+    both migrations.  A JQL Jira rejects (400, e.g. a field it cannot search)
+    is retried field by field and only the rejected fields are skipped; if
+    none could be searched the error is raised.
+
+    Edits go to planner (a local one flushed here if None); field metadata
+    comes from registry (loaded from cache/Jira if None); a dry run with a
+    local planner adds its edits to plan (a ChangePlan) if given."""
+    lg=logging.getLogger("pickers")
+    want={k:v for k,v in ((":userpicker",single),(":multiuserpicker",multi)) if v is not None}
+    if registry is None: registry=FieldRegistry.load(sess,base)
+    kind={f["id"]:suf for suf in want for f in registry.of_type(suf)}
+    if not kind: return
+    unres_all=all(want.values()); local_unres=any(want.values()) and not unres_all
+    fields=sorted(kind)+(["resolution"] if local_unres else [])
+    clauses=[f'cf[{fid.replace("customfield_","")}] = {jql_str(src)}' for fid in sorted(kind)]
+    own=planner is None
+    if own: planner=IssuePlanner()
+    rejected=[]
+    def search(chunk):
+        jql="("+" OR ".join(chunk)+")"
+        if unres_all: jql+=' AND resolution=Unresolved'
+        try: return list(search_issues(sess,base,jql,fields,lg))
+        except SearchError as e:
+            if e.status!=400: raise
+            if len(chunk)>1:
+                lg.warning("picker search rejected, retrying field by field: %s",e)
+                return [it for c in chunk for it in search([c])]
+            lg.error("skipped %s: %s",chunk[0],e); rejected.append(e); return []
+    found={}   # key → issue; a field-by-field retry can return an issue more than once
+    for chunk in jql_chunks(clauses,sep=" OR "):
+        for it in search(chunk): found.setdefault(it["key"],it)
+    if len(rejected)==len(clauses): raise rejected[-1]
+    edits=0
+    for it in found.values():
+        key=it["key"]; f=it["fields"]
+        for fid,suf in kind.items():
+            if local_unres and want[suf] and f.get("resolution"): continue
+            cur=f.get(fid)
+            if suf==":userpicker":
+                if not (cur and cur["name"]==src): continue
+                planner.update(key,{fid:{"name":tgt}},{fid:_user_ref(cur)},{(src,tgt)})
+            else:
+                if not any(u["name"]==src for u in cur or []): continue
+                planner.swap_user(key,fid,cur,src,tgt)
+            edits+=1
+    lg.info("%d picker edit(s) across %d field(s)",edits,len(kind))
+    if own: planner.flush(sess,base,dry,journal,plan)
+
+def single_picker(sess,base,src,tgt,unres,dry,planner=None,registry=None):
+    migr_pickers(sess,base,src,tgt,unres,None,dry,planner,registry)
+
+def multi_picker(sess,base,src,tgt,unres,dry,planner=None,registry=None):
+    migr_pickers(sess,base,src,tgt,None,unres,dry,planner,registry)
+
+# ─────────────── pair scheduler ───────────────
+PAIR_WORKERS=4    # default number of pairs migrated at once
+
+DEFAULTS={"url":"","adm":"","pw":"","dry":True,
+          "groups":False,"exclude":"","group_sync":True,
+          "filters":False,"filter_csv":"","filter_discover":False,
+          "issues":False,"issue_unres":True,"issue_batch":True,
+          "roles":False,"roles_csv":"",
+          "single":False,"single_unres":True,
+          "multi":False,"multi_unres":True,
+          "workers":PAIR_WORKERS,"in_flight":MAX_IN_FLIGHT,"run_id":"",
+          "jsonl":"","plan":"","check":False,
+          "defer_issues":False}   # return the issue edits in result["issues"] instead of writing them
+
+def read_pairs(path):
+    """(source, target) rows of a pairs CSV, header row skipped."""
+    pairs=[]
+    with open(path,newline='',encoding="utf-8-sig") as f:
+        for r in csv.reader(f):
+            if len(r)<2 or r[0].lower().startswith("source"): continue
+            pairs.append((r[0].strip(),r[1].strip()))
+    return pairs
+
+def run_pair(sess,src,tgt,o,roles,fields,planner,batch_issues,journal=None,filters=None,plan=None,edits=True):
+    """Every enabled feature for one pair, logged to Logs/<source>.log; issues
+    and pickers only if edits (False for a source with several targets).
+    Returns None, or the error that stopped the pair or the failures of a feature."""
+    token=current_pair.set((src,tgt))
+    fh=logging.FileHandler(os.path.join(ensure_log_dir(),f"{src}.log"),
+                           mode="a",encoding="utf-8"); fh.setFormatter(FMT)
+    fh.addFilter(PairFilter((src,tgt))); ROOT.addHandler(fh)
+    try:
+        ROOT.info("=== %s → %s (%s UTC) ===",src,tgt,datetime.now(timezone.utc).strftime('%H:%M:%S'))
+        pair=f"{src}→{tgt}"
+        errors=[]   # failures of features that ran on; the pair goes on with the next feature
+        if o["groups"] and not o.get("group_sync"):
+            with sess.metrics.phase("groups",pair):
+                migr_groups(sess,o["url"],src,tgt,o["exclude"],o["dry"],journal,plan)
+        if o["filters"]:
+            with sess.metrics.phase("filters",pair):
+                bad=migr_filters(sess,o["url"],o["filter_csv"],src,tgt,o["dry"],journal,
+                                 filters,o.get("filter_discover",False),plan=plan)
+            if bad: errors.append(f"filters: {len(bad)} failed: {', '.join(bad[:5])}{', …' if len(bad)>5 else ''}")
+        if o["issues"] and not batch_issues and edits:
+            with sess.metrics.phase("issues",pair):
+                migr_issues(sess,o["url"],src,tgt,o["issue_unres"],o["dry"],planner)
+        if roles is not None:
+            with sess.metrics.phase("roles",pair):
+                fast_roles(sess,o["url"],o["roles_csv"],src,tgt,o["dry"],roles,journal,plan)
+        if (o["single"] or o["multi"]) and edits:
+            with sess.metrics.phase("pickers",pair):
+                migr_pickers(sess,o["url"],src,tgt,
+                             o["single_unres"] if o["single"] else None,
+                             o["multi_unres"] if o["multi"] else None,
+                             o["dry"],planner,fields)
+        ROOT.info("done (%s)",datetime.now(timezone.utc).strftime('%H:%M:%S'))
+        return "; ".join(errors) or None
+    except Exception as e:
+        ROOT.exception("pair %s → %s failed",src,tgt); return repr(e)
+    finally:
+        ROOT.removeHandler(fh); fh.close(); current_pair.reset(token)
+
+def run_pairs(pairs,o):
+    """Migrate pairs on a pool of o["workers"] threads, at most o["in_flight"]
+    requests to the Jira host at a time; issue edits of all pairs are merged
+    and written once every pair is done.  o is merged over DEFAULTS.
+
+    Returns {"pairs": n, "failed": [[src, tgt, error]], "run_id": id or None,
+    "journal": {status: count}, "metrics": [summary path, prometheus path],
+    "stats": the run's Metrics.export(), "plan": change plan path or None}.
+
+    A dry run writes its change plan to o["plan"] (default
+    Logs/plan-<time>.jsonl).  o["jsonl"] adds a JsonlHandler for the run.  With
+    o["defer_issues"] the issue edits are not written but returned as
+    result["issues"] (IssuePlanner.export()), for write_issues()."""
+    o={**DEFAULTS,**o}
+    jh=None
+    if o["jsonl"]: jh=JsonlHandler(o["jsonl"]); ROOT.addHandler(jh)
+    try: return _run_pairs(pairs,o)
+    finally:
+        if jh: ROOT.removeHandler(jh); jh.close()
+
+def _run_pairs(pairs,o):
+    metrics=Metrics()   # per run: a GUI apply or a second run must not reset these
+    set_host_limit(o["url"],o["in_flight"])
+    sess=new_session(o["adm"],o["pw"],pool=max(POOL_SIZE,o["in_flight"]),metrics=metrics)
+    journal=None
+    if not o["dry"]:
+        journal=Journal(run_id=o.get("run_id") or None)
+        ROOT.info("journal run id: %s %s",journal.run_id,journal.summary() or "(new)")
+    plan=ChangePlan(o["url"],o.get("run_id") or "") if o["dry"] else None
+    roles=filters=fields=None; failed=[]   # [[src, tgt, error]] of pairs failed outside run_pair
+    with metrics.phase("indexes"):
+        if o["roles"]:
+            if os.path.isfile(o["roles_csv"]):
+                roles=RoleIndex.load(o["roles_csv"])
+                ROOT.info("roles index: %d user(s)",len(roles))
+            else:
+                ROOT.error("roles CSV missing: %s – no roles moved",o["roles_csv"])
+                failed+=[[src,tgt,f"roles: CSV missing: {o['roles_csv']}"] for src,tgt in pairs]
+        if o["filters"] and not o.get("filter_discover"):
+            if os.path.isfile(o["filter_csv"]):
+                filters=FilterIndex.load(o["filter_csv"])
+                ROOT.info("filter index: %d owner(s)",len(filters))
+            else:
+                ROOT.error("filter CSV missing: %s – no filters moved",o["filter_csv"])
+                failed+=[[src,tgt,f"filters: CSV missing: {o['filter_csv']}"] for src,tgt in pairs]
+                o={**o,"filters":False}
+        if o["filters"] and o.get("filter_discover") and not filter_search_available(sess,o["url"]):
+            ROOT.error("filter discovery needs %s%s, which this Jira does not serve (Jira DC has no "
+                       "owner search) – no filters moved; run with a filter CSV",o["url"],FILTER_SEARCH)
+            failed+=[[src,tgt,f"filters: {FILTER_SEARCH} not available"] for src,tgt in pairs]
+            o={**o,"filters":False}
+        if o["single"] or o["multi"]:
+            fields=FieldRegistry.load(sess,o["url"])
+    planner=IssuePlanner()   # one PUT per issue for assignee/reporter/picker edits of every pair
+    if o["groups"] and o.get("group_sync"):
+        with metrics.phase("group sync"),pair_logs():
+            groups,unread=plan_groups(sess,o["url"],pairs,o["exclude"],o["in_flight"])
+            failed+=unread+apply_group_plan(sess,o["url"],groups,o["dry"],journal,o["in_flight"],plan)
+    batch_issues=o["issues"] and o["issue_batch"] and len(pairs)>1
+    if batch_issues:
+        with metrics.phase("issues batch"),pair_logs():
+            failed+=migr_issues_batch(sess,o["url"],pairs,o["issue_unres"],o["dry"],planner)
+    # a source with several targets gets no issue / picker edits from run_pair (the batch refused its issues)
+    what=" and ".join(f for f,on in (("issues",o["issues"] and not batch_issues),
+                                      ("pickers",o["single"] or o["multi"])) if on)
+    refused=set()
+    if what:
+        with pair_logs(): unmapped=refuse_multi_targets(logging.getLogger("issues"),pairs,what)
+        failed+=unmapped; refused={src for src,_,_ in unmapped}
+    with ThreadPoolExecutor(max_workers=max(1,o["workers"])) as pool:
+        futs={pool.submit(run_pair,sess,src,tgt,o,roles,fields,planner,batch_issues,journal,filters,plan,
+                          src not in refused):(src,tgt)
+              for src,tgt in pairs}
+    result={"pairs":len(pairs),"failed":failed+[[*futs[f],f.result()] for f in futs if f.result()],
+            "run_id":None,"journal":{},"plan":None}
+    if o["defer_issues"]: result["issues"]=planner.export()
+    elif len(planner):
+        with metrics.phase("issue writes"),pair_logs(): planner.flush(sess,o["url"],o["dry"],journal,plan)
+    if plan is not None:
+        result["plan"]=plan.save(o["plan"] or os.path.join(
+            ensure_log_dir(),f"plan-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.jsonl"))
+        ROOT.info("change plan %s: %s",result["plan"],plan.counts())
+    if journal:
+        left=journal.remaining()
+        result["run_id"],result["journal"]=journal.run_id,journal.summary()
+        ROOT.info("journal %s: %s",journal.run_id,result["journal"])
+        for feature,s_,t_,oid,status,detail in left[:50]:
+            ROOT.warning("left: %s %s %s→%s %s (%s)",status,feature,s_,t_,oid,detail)
+        if len(left)>50: ROOT.warning("... %d more – python journal.py %s",len(left)-50,journal.run_id)
+        journal.close()
+    result["metrics"]=metrics.write_reports(ensure_log_dir(),
+                                            f"metrics-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+    result["stats"]=metrics.export()
+    ROOT.info("metrics: %s",", ".join(result["metrics"]))
+    ROOT.info("ALL completed")
+    return result
+
+def write_issues(edits,o,metrics=None):
+    """Write the issue edits of several defer_issues runs (their result["issues"])
+    as one PUT per issue, the edits of every run merged; journalled under
+    o["run_id"], requests and the phase recorded in metrics (a Metrics) if
+    given.  Returns (plan, failed): a dry run's edits as a ChangePlan (else
+    None) and [[src, tgt, error]] of the pairs behind issues absorb() refused."""
+    o={**DEFAULTS,**o}
+    planner=IssuePlanner(); failed=[]
+    for e in edits: failed+=planner.absorb(e)
+    lg=logging.getLogger("issues")
+    with pair_logs():
+        for src,tgt,err in failed: log_pairs(lg,[(src,tgt)],logging.ERROR,"%s – issue left alone",err)
+    ROOT.info("issue edits of %d run(s): %d issue(s), %d refused",len(edits),len(planner),len(planner.refused))
+    if not len(planner): return None,failed
+    set_host_limit(o["url"],o["in_flight"])
+    sess=new_session(o["adm"],o["pw"],pool=max(POOL_SIZE,o["in_flight"]),metrics=metrics or Metrics())
+    journal=None if o["dry"] else Journal(run_id=o.get("run_id") or None)
+    plan=ChangePlan(o["url"],o.get("run_id") or "") if o["dry"] else None
+    with sess.metrics.phase("issue writes"),pair_logs(): planner.flush(sess,o["url"],o["dry"],journal,plan)
+    if journal: journal.close()
+    return plan,failed
+
+# ─────────────── change plan apply ───────────────
+def _plan_key(op):
+    """Journal key of a plan operation – the same the live helpers use, so a
+    plan apply and a live run resume each other."""
+    k=op["op"]
+    if k=="group": return "groups",op["src"],op["tgt"],op["group"]
+    if k=="role": return "roles",op["src"],op["tgt"],f"{op['project']}/{op['role']}"
+    if k=="filter": return "filters",op["src"],op["tgt"],op["id"]
+    return "issue","","",issue_oid(op["key"],op["after"])
+
+def _same(a,b):
+    """Equal user field values: compared by name, multi-user lists as sets."""
+    if isinstance(a,list) or isinstance(b,list):
+        return {u["name"] for u in a or []}=={u["name"] for u in b or []}
+    return (a or {}).get("name")==(b or {}).get("name")
+
+def apply_op(s,base,op,journal=None,check=False):
+    """Write one plan operation.  check re-reads filters and issues first and
+    skips them as "conflict" if they no longer hold the plan's before values.
+    Returns "done", "skipped" (done in the journal), "conflict" or "failed"."""
+    lg=logging.getLogger("apply")
+    k=op["op"]; key=_plan_key(op); body=None
+    pairs=op.get("pairs") or ([(op["src"],op["tgt"])] if "src" in op else [])
+    if journal and journal.done(*key): return "skipped"
+    if check and k in ("filter","issue"):
+        if k=="filter":
+            r=s.get(f"{base}/rest/api/2/filter/{op['id']}")
+            cur=r.json() if r.status_code==200 else {}
+            ok=(cur.get("owner") or {}).get("name")==op["before"]["owner"]
+            body={**cur,"owner":{"name":op["tgt"]}}
+        else:
+            r=s.get(f"{base}/rest/api/2/issue/{op['key']}",params={"fields":",".join(op["before"])})
+            cur=r.json().get("fields",{}) if r.status_code==200 else None
+            ok=cur is not None and all(_same(cur.get(f),v) for f,v in op["before"].items())
+        if not ok:
+            if journal: journal.record(*key,False,f"conflict ({r.status_code})")
+            log_pairs(lg,pairs,logging.WARNING,"conflict, not written: %s",diff_line(op)); return "conflict"
+    if k=="role":
+        ok,status=add_role_user(s,op["url"],op["tgt"])
+    elif k=="group":
+        ok,status=add_group_user(s,base,op["group"],op["tgt"])
+    elif k=="filter":
+        r=s.put(f"{base}/rest/api/2/filter/{op['id']}",params={"overrideSharePermissions":"true"},
+                json=body or op["body"])
+    else:
+        r=s.put(f"{base}/rest/api/2/issue/{op['key']}?notifyUsers=false",json={"fields":op["after"]},
+                headers={"Content-Type":"application/json"})
+    if k not in ("role","group"): ok,status=r.ok,r.status_code
+    if journal: journal.record(*key,ok,status)
+    log_pairs(lg,pairs,logging.INFO if ok else logging.ERROR,"%s (%s)",diff_line(op),status)
+    return "done" if ok else "failed"
+
+def apply_plan(plan,o):
+    """Write a change plan compiled by a dry run (a ChangePlan or its path):
+    one kind after the other (groups, roles, filters, issues), the operations
+    of a kind on a pool of o["in_flight"] threads, journalled like a live run.
+    Nothing is read unless o["check"] is set (see apply_op).  The plan's URL
+    is used; o["url"], if set, must match it.
+
+    Returns {"ops": n, "done", "skipped", "conflict", "failed": counts,
+    "run_id": id, "journal": {status: count}, "metrics": [paths],
+    "stats": Metrics.export()}."""
+    o={**DEFAULTS,**o}
+    if not isinstance(plan,ChangePlan): plan=ChangePlan.load(plan)
+    base=plan.url.rstrip("/")
+    if o["url"] and o["url"].rstrip("/")!=base: raise ValueError(f"plan is for {base}, not {o['url']}")
+    metrics=Metrics()
+    set_host_limit(base,o["in_flight"])
+    sess=new_session(o["adm"],o["pw"],pool=max(POOL_SIZE,o["in_flight"]),metrics=metrics)
+    journal=Journal(run_id=o.get("run_id") or None)
+    ROOT.info("applying %s: %s – journal run id %s %s",base,plan.counts(),journal.run_id,journal.summary() or "(new)")
+    counts=collections.Counter()
+    with ThreadPoolExecutor(max_workers=max(1,o["in_flight"])) as pool,pair_logs():
+        for kind,ops in plan.by_kind().items():
+            if not ops: continue
+            done=collections.Counter()
+            with metrics.phase(f"apply {kind}"):
+                journal.plan_many(_plan_key(ops[0])[0],[_plan_key(op)[1:] for op in ops])
+                for fut in [submit_ctx(pool,apply_op,sess,base,op,journal,o["check"]) for op in ops]:
+                    try: done[fut.result()]+=1
+                    except Exception as e: done["failed"]+=1; ROOT.error("%s: %s",kind,e)
+            ROOT.info("%s: %s",kind,dict(done)); counts+=done
+    result={"ops":len(plan),**{c:counts[c] for c in ("done","skipped","conflict","failed")},
+            "run_id":journal.run_id,"journal":journal.summary()}
+    journal.close()
+    result["metrics"]=metrics.write_reports(ensure_log_dir(),
+                                            f"metrics-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+    ROOT.info("plan applied: %s",{k:v for k,v in result.items() if k!="metrics"})
+    result["stats"]=metrics.export()
+    return result
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Jira DC / Confluence – for benchmarks and dry runs
+─────────────────────────────────────────────────────────────────────
+Serves the REST endpoints the migration scripts call, over a synthetic
+dataset generated from a seed (same seed → same users, groups, issues,
+filters, projects and roles):
+
+  Jira        GET  /rest/api/2/user?username=&expand=groups
+              POST /rest/api/2/group/user?groupname=
+              GET|POST /rest/api/2/search                  (paged, JQL subset below)
+              GET|PUT /rest/api/2/issue/{key}
+              GET  /rest/api/2/field
+              GET  /rest/api/2/filter/search?owner=       (paged; Jira Cloud API, not on DC)
+              GET|PUT /rest/api/2/filter/{id}
+              GET  /rest/api/2/project
+              GET  /rest/api/2/project/{key}/role
+              GET|POST /rest/api/2/project/{key}/role/{id}
+  Confluence  GET  /rest/api/user/memberof?username=      (paged)
+              PUT  /rest/api/user/{user}/group/{group}
+
+JQL understood: assignee / reporter / cf[N] with = "x" or in ("x", ...),
+ORed together, optionally AND resolution=Unresolved – what the engine sends.
+As on Jira, a name that is not a user fails the whole JQL with 400, and a
+group or role add for a user already in it is answered 400 (Jira DC).
+
+Every request waits latency × (1 ± jitter) seconds.  429s with Retry-After
+are injected at random (rate_429) and whenever the token bucket (rps) is
+empty.  Writes change the dataset, so a live run converges like on Jira.
+
+  python mock_jira.py [--port 8799] [--pairs 500] [--latency 0.02] [--rate-429 0.01]
+
+Users src0001… are paired with tgt0001… (see Dataset.pairs_of()).
+"""
+
+import re, json, time, random, argparse, threading, multiprocessing, urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+USERPICKER = "com.atlassian.jira.plugin.system.customfieldtypes:userpicker"
+MULTIPICKER = "com.atlassian.jira.plugin.system.customfieldtypes:multiuserpicker"
+ROLE_NAMES = ("Administrators", "Developers", "Users")
+
+CONFIG = {"pairs": 500,            # src/tgt user pairs
+          "others": 2000,          # users not being migrated
+          "groups": 400,
+          "issues": 20000,
+          "filters": 3000,
+          "projects": 150,
+          "seed": 1,
+          "latency": 0.02,         # seconds per request
+          "jitter": 0.5,           # ± fraction of latency
+          "rate_429": 0.0,         # probability of an injected 429
+          "rps": 0,                # token bucket refill per second, 0 = unlimited
+          "retry_after": 1,        # Retry-After seconds sent with a 429
+          "page_cap": 100}         # maxResults ceiling for search / filter search
+
+# ──────────────── dataset ────────────────
+class Dataset:
+    """Synthetic Jira + Confluence content; all access under self.lock."""
+    def __init__(self, cfg):
+        rnd = random.Random(cfg["seed"]); self.lock = threading.Lock()
+        n = cfg["pairs"]
+        self.sources, self.targets = map(list, zip(*self.pairs_of(n))) if n else ([], [])
+        users = self.sources + self.targets + [f"user{i:05d}" for i in range(1, cfg["others"] + 1)]
+        self.users = set(users)
+        groups = [f"grp-{i:03d}" for i in range(cfg["groups"])]
+
+        def memberships():
+            m = {u: set(rnd.sample(groups, rnd.randint(3, 15))) for u in users}
+            for s, t in zip(self.sources, self.targets):      # targets already have part of it
+                m[t] |= set(rnd.sample(sorted(m[s]), len(m[s]) // 2))
+            return m
+        self.jira_groups, self.conf_groups = memberships(), memberships()
+
+        self.fields = [{"id": f, "name": f.title(), "custom": False, "schema": {"type": "user", "system": f}}
+                       for f in ("assignee", "reporter")]
+        self.fields += [
+            {"id": "customfield_10100", "name": "Approver", "custom": True,
+             "schema": {"type": "user", "custom": USERPICKER, "customId": 10100}},
+            {"id": "customfield_10101", "name": "Reviewers", "custom": True,
+             "schema": {"type": "array", "items": "user", "custom": MULTIPICKER, "customId": 10101}}]
+
+        pick = lambda: {"name": rnd.choice(users)}
+        self.issues = {}
+        for i in range(1, cfg["issues"] + 1):
+            key = f"PRJ{i % cfg['projects']:03d}-{i}"
+            self.issues[key] = {"id": str(10000 + i), "key": key, "fields": {
+                "assignee": pick() if rnd.random() < 0.9 else None,
+                "reporter": pick(),
+                "resolution": {"name": "Done"} if rnd.random() < 0.6 else None,
+                "customfield_10100": pick() if rnd.random() < 0.3 else None,
+                "customfield_10101": [pick() for _ in range(rnd.randint(1, 4))] if rnd.random() < 0.3 else None}}
+
+        self.filters = {str(20000 + i): {"id": str(20000 + i), "name": f"Filter {i}",
+                                         "jql": f"project = PRJ{i % cfg['projects']:03d}",
+                                         "owner": pick()}
+                        for i in range(cfg["filters"])}
+
+        self.projects, self.roles = [], {}
+        for i in range(cfg["projects"]):
+            key = f"PRJ{i:03d}"
+            self.projects.append({"id": str(30000 + i), "key": key, "name": f"Project {i}"})
+            for j, rname in enumerate(ROLE_NAMES):
+                actors = [{"type": "atlassian-user-role-actor", "name": u}
+                          for u in rnd.sample(users, rnd.randint(0, 6))]
+                if rnd.random() < 0.5:
+                    actors.append({"type": "atlassian-group-role-actor", "name": rnd.choice(groups)})
+                self.roles[(key, str(10002 + j))] = {"id": 10002 + j, "name": rname, "actors": actors}
+
+    @staticmethod
+    def pairs_of(n):
+        """The (source, target) user pairs of a dataset with n pairs."""
+        return [(f"src{i:04d}", f"tgt{i:04d}") for i in range(1, n + 1)]
+
+    # ───── JQL subset ─────
+    CLAUSE = re.compile(r'(assignee|reporter|cf\[(\d+)\])\s*(=|in)\s*(\((?:\s*"(?:[^"\\]|\\.)*"\s*,?)*\)|"(?:[^"\\]|\\.)*")')
+    LITERAL = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+    @classmethod
+    def parse_jql(cls, jql):
+        """[(field id, {names})] ORed, and the unresolved-only flag; ValueError if unsupported."""
+        unres = bool(re.search(r"\bAND\s+resolution\s*=\s*Unresolved\b", jql, re.I))
+        rest = re.sub(r"\bAND\s+resolution\s*=\s*Unresolved\b", "", jql, flags=re.I)
+        clauses = []
+        for m in cls.CLAUSE.finditer(rest):
+            fid = f"customfield_{m.group(2)}" if m.group(2) else m.group(1)
+            names = {re.sub(r"\\(.)", r"\1", v) for v in cls.LITERAL.findall(m.group(4))}
+            clauses.append((fid, names))
+        leftover = re.sub(r"[()\s]|\bOR\b", "", cls.CLAUSE.sub("", rest))
+        if not clauses or leftover: raise ValueError(f"unsupported JQL: {jql[:200]}")
+        return clauses, unres
+
+    def search(self, jql, start, limit, fields):
+        clauses, unres = self.parse_jql(jql)
+        for fid, names in clauses:
+            for name in sorted(names - self.users):
+                raise ValueError(f"The value '{name}' does not exist for the field '{fid}'.")
+        def hit(f):
+            if unres and f["resolution"]: return False
+            for fid, names in clauses:
+                v = f.get(fid)
+                if isinstance(v, list) and any(u["name"] in names for u in v): return True
+                if isinstance(v, dict) and v["name"] in names: return True
+            return False
+        with self.lock:
+            found = [it for it in self.issues.values() if hit(it["fields"])]
+            page = [{"id": it["id"], "key": it["key"],
+                     "fields": {f: it["fields"].get(f) for f in fields}} for it in found[start:start + limit]]
+        return {"startAt": start, "maxResults": limit, "total": len(found), "issues": json.loads(json.dumps(page))}
+
+# ──────────────── HTTP ────────────────
+class Throttle:
+    """Token bucket; take() is False when the caller should get a 429."""
+    def __init__(self, rps):
+        self.rps, self.tokens, self.at, self.lock = rps, float(rps), time.monotonic(), threading.Lock()
+
+    def take(self):
+        if not self.rps: return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rps, self.tokens + (now - self.at) * self.rps); self.at = now
+            if self.tokens < 1: return False
+            self.tokens -= 1; return True
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"        # keep-alive, like Jira behind a proxy
+    disable_nagle_algorithm = True       # headers and body go out as separate writes
+
+    def log_message(self, *a): pass
+
+    # ───── plumbing ─────
+    def send(self, code, obj=None, headers=()):
+        body = b"" if obj is None else json.dumps(obj).encode()
+        self.send_response(code)
+        if obj is not None: self.send_header("Content-Type", "application/json")
+        for k, v in headers: self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body))); self.end_headers()
+        self.wfile.write(body)
+
+    def dispatch(self, method):
+        srv = self.server; cfg = srv.cfg
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b""
+        if random.random() < cfg["rate_429"] or not srv.throttle.take():
+            return self.send(429, {"errorMessages": ["Rate limit exceeded"]},
+                             [("Retry-After", str(cfg["retry_after"]))])
+        if cfg["latency"]:
+            time.sleep(cfg["latency"] * (1 + cfg["jitter"] * (2 * random.random() - 1)))
+        u = urllib.parse.urlsplit(self.path)
+        self.q = {k: v[0] for k, v in urllib.parse.parse_qs(u.query).items()}
+        try: self.body = json.loads(raw) if raw else {}
+        except ValueError: return self.send(400, {"errorMessages": ["bad JSON"]})
+        path = urllib.parse.unquote(u.path)
+        for m, rx, fn in ROUTES:
+            match = rx.fullmatch(path)
+            if match and m == method:
+                try: return fn(self, srv.data, *match.groups())
+                except (KeyError, ValueError) as e: return self.send(400, {"errorMessages": [str(e)]})
+        self.send(404, {"errorMessages": [f"no mock for {method} {path}"]})
+
+    def do_GET(self): self.dispatch("GET")
+    def do_POST(self): self.dispatch("POST")
+    def do_PUT(self): self.dispatch("PUT")
+
+    @property
+    def base(self): return f"http://{self.headers.get('Host')}"
+
+    # ───── Jira ─────
+    def user(self, d):
+        name = self.q["username"]
+        if name not in d.users: return self.send(404, {"errorMessages": [f"The user named '{name}' does not exist"]})
+        with d.lock: groups = sorted(d.jira_groups[name])
+        self.send(200, {"name": name, "key": name, "displayName": name.title(),
+                        "groups": {"size": len(groups), "items": [{"name": g} for g in groups]}})
+
+    def group_add(self, d):
+        name = self.body["name"]
+        if name not in d.users: return self.send(404, {"errorMessages": [f"user {name} not found"]})
+        group = self.q["groupname"]
+        with d.lock:
+            if group in d.jira_groups[name]:
+                return self.send(400, {"errorMessages": [f"Cannot add user. '{name}' is already a member of '{group}'"]})
+            d.jira_groups[name].add(group)
+        self.send(201, {"name": self.q["groupname"]})
+
+    def search(self, d):
+        src = self.body if self.command == "POST" else self.q
+        fields = src.get("fields") or ["assignee", "reporter"]
+        if isinstance(fields, str): fields = fields.split(",")
+        limit = min(int(src.get("maxResults", 50)), self.server.cfg["page_cap"])
+        self.send(200, d.search(src["jql"], int(src.get("startAt", 0)), limit, fields))
+
+    def issue_get(self, d, key):
+        with d.lock:
+            it = d.issues.get(key)
+            if it: want = self.q.get("fields", "").split(",") if self.q.get("fields") else list(it["fields"])
+            it = it and json.loads(json.dumps({"id": it["id"], "key": key,
+                                               "fields": {f: it["fields"].get(f) for f in want}}))
+        self.send(200, it) if it else self.send(404, {"errorMessages": ["Issue Does Not Exist"]})
+
+    def issue_put(self, d, key):
+        with d.lock:
+            if key not in d.issues: return self.send(404, {"errorMessages": ["Issue Does Not Exist"]})
+            d.issues[key]["fields"].update(self.body.get("fields", {}))
+        self.send(204)
+
+    def field(self, d): self.send(200, d.fields)
+
+    def filter_search(self, d):
+        start = int(self.q.get("startAt", 0))
+        limit = min(int(self.q.get("maxResults", 50)), self.server.cfg["page_cap"])
+        with d.lock:
+            found = [f for f in d.filters.values() if f["owner"]["name"] == self.q.get("owner", f["owner"]["name"])]
+            page = json.loads(json.dumps(found[start:start + limit]))
+        self.send(200, {"startAt": start, "maxResults": limit, "total": len(found),
+                        "isLast": start + limit >= len(found), "values": page})
+
+    def filter_get(self, d, fid):
+        with d.lock: f = json.loads(json.dumps(d.filters.get(fid)))
+        self.send(200, f) if f else self.send(404, {"errorMessages": [f"filter {fid} not found"]})
+
+    def filter_put(self, d, fid):
+        with d.lock:
+            if fid not in d.filters: return self.send(404, {"errorMessages": [f"filter {fid} not found"]})
+            d.filters[fid].update({k: v for k, v in self.body.items() if k in ("name", "jql", "owner")})
+            f = json.loads(json.dumps(d.filters[fid]))
+        self.send(200, f)
+
+    def projects(self, d): self.send(200, d.projects)
+
+    def role_map(self, d, key):
+        urls = {r["name"]: f"{self.base}/rest/api/2/project/{k}/role/{rid}"
+                for (k, rid), r in d.roles.items() if k == key}
+        self.send(200, urls) if urls else self.send(404, {"errorMessages": [f"No project could be found with key '{key}'."]})
+
+    def role(self, d, key, rid):
+        with d.lock:
+            r = d.roles.get((key, rid))
+            if r and self.command == "POST":
+                have = {a["name"] for a in r["actors"] if a["type"] == "atlassian-user-role-actor"}
+                dup = [u for u in self.body.get("user", []) if u in have]
+                if dup: return self.send(400, {"errorMessages": [f"User '{dup[0]}' is already a member of the project role."]})
+                r["actors"] += [{"type": "atlassian-user-role-actor", "name": u} for u in self.body.get("user", [])]
+            r = json.loads(json.dumps(r))
+        if not r: return self.send(404, {"errorMessages": ["role not found"]})
+        self.send(200, {"self": f"{self.base}/rest/api/2/project/{key}/role/{rid}", **r})
+
+    # ───── Confluence ─────
+    def memberof(self, d):
+        name = self.q["username"]
+        if name not in d.users: return self.send(404, {"message": f"user {name} not found"})
+        start, limit = int(self.q.get("start", 0)), min(int(self.q.get("limit", 200)), 200)
+        with d.lock: page = sorted(d.conf_groups[name])[start:start + limit]
+        self.send(200, {"results": [{"type": "group", "name": g} for g in page],
+                        "start": start, "limit": limit, "size": len(page)})
+
+    def conf_group_add(self, d, user, group):
+        if user not in d.users: return self.send(404, {"message": f"user {user} not found"})
+        with d.lock: d.conf_groups[user].add(group)
+        self.send(204)
+
+ROUTES = [(m, re.compile(p), fn) for m, p, fn in (
+    ("GET",  r"/rest/api/2/user",                       Handler.user),
+    ("POST", r"/rest/api/2/group/user",                 Handler.group_add),
+    ("GET",  r"/rest/api/2/search",                     Handler.search),
+    ("POST", r"/rest/api/2/search",                     Handler.search),
+    ("GET",  r"/rest/api/2/issue/([^/]+)",              Handler.issue_get),
+    ("PUT",  r"/rest/api/2/issue/([^/]+)",              Handler.issue_put),
+    ("GET",  r"/rest/api/2/field",                      Handler.field),
+    ("GET",  r"/rest/api/2/filter/search",              Handler.filter_search),
+    ("GET",  r"/rest/api/2/filter/([^/]+)",             Handler.filter_get),
+    ("PUT",  r"/rest/api/2/filter/([^/]+)",             Handler.filter_put),
+    ("GET",  r"/rest/api/2/project",                    Handler.projects),
+    ("GET",  r"/rest/api/2/project/([^/]+)/role",       Handler.role_map),
+    ("GET",  r"/rest/api/2/project/([^/]+)/role/(\d+)", Handler.role),
+    ("POST", r"/rest/api/2/project/([^/]+)/role/(\d+)", Handler.role),
+    ("GET",  r"/rest/api/user/memberof",                Handler.memberof),
+    ("PUT",  r"/rest/api/user/([^/]+)/group/([^/]+)",   Handler.conf_group_add),
+)]
+
+class MockJira(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, cfg=None, port=0, host="127.0.0.1"):
+        self.cfg = {**CONFIG, **(cfg or {})}
+        self.data = Dataset(self.cfg); self.throttle = Throttle(self.cfg["rps"])
+        super().__init__((host, port), Handler)
+
+    @property
+    def url(self): return "http://%s:%d" % self.server_address[:2]
+
+def _serve(cfg, port, ready):
+    srv = MockJira(cfg, port); ready.put(srv.url); srv.serve_forever()
+
+def start(cfg=None, port=0):
+    """Run a MockJira in a child process (its own GIL); returns (process, base url)."""
+    ctx = multiprocessing.get_context("spawn"); ready = ctx.Queue()
+    proc = ctx.Process(target=_serve, args=(cfg, port, ready), daemon=True); proc.start()
+    return proc, ready.get(timeout=120)
+
+def main():
+    ap = argparse.ArgumentParser(description="Mock Jira / Confluence REST server")
+    ap.add_argument("--port", type=int, default=8799)
+    for k, v in CONFIG.items():
+        ap.add_argument("--" + k.replace("_", "-"), type=type(v), default=v)
+    a = vars(ap.parse_args()); port = a.pop("port")
+    srv = MockJira(a, port)
+    print(f"mock Jira/Confluence on {srv.url}  ({len(srv.data.issues)} issues, "
+          f"{len(srv.data.users)} users, pairs src0001→tgt0001 … ) – Ctrl+C to stop")
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+
+if __name__ == "__main__":
+    main()
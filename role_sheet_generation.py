@@ -6,45 +6,185 @@ and write a CSV:
 project_key,role_name,role_url,usernames
 
 `usernames` is a semicolon‑separated list of the user *names* in that role.
+
+Projects and role details are fetched concurrently on a bounded worker pool;
+rows are streamed to the CSV project by project, sorted by project_key and
+role_name, so the output is identical between runs over unchanged data.
+
+Every run also saves <name>.snapshot.json next to <name>.csv (the CSV path
+without its extension) with each project's role actors and a fingerprint per
+project and per role.  In incremental mode only projects that are new, forced,
+or older than the TTL are rescanned; the rest are reused from the snapshot and
+the CSV is rewritten from the merged result.
 """
 
-import csv, os, requests, urllib3
+import csv, os, json, time, heapq, hashlib, urllib3
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from getpass import getpass
+from operator import itemgetter
+from http_transport import new_session, set_host_limit
+from metrics import METRICS
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+DEFAULT_WORKERS = 8     # concurrent requests to Jira
+SNAPSHOT_TTL_H  = 24    # incremental mode: rescan projects older than this
+
+# ───────────────────────────────────────────────────────────────────────────
+def get_json(sess, url):
+    r = sess.get(url)
+    r.raise_for_status()
+    return r.json()
+
+def user_actors(role):
+    """Names of the direct user actors of a role payload."""
+    return [a["name"] for a in role.get("actors", [])
+            if a.get("type") == "atlassian-user-role-actor"]
+
+def fingerprint(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True).encode()).hexdigest()[:16]
+
+def scan_roles(sess, jira, keys, workers=DEFAULT_WORKERS):
+    """
+    Yield (project_key, roles) for the given projects sorted by project_key,
+    where roles is a list of (role_name, role_url, usernames) sorted by
+    role_name, or None if the project's role list could not be fetched.
+    usernames is None for a role whose details could not be fetched.
+
+    Role maps and role details are fetched on one pool of `workers` threads
+    (a project's role details are submitted as soon as its role map arrives);
+    a project is yielded as soon as it and every project before it are
+    complete.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        roles = {}                                   # key -> Future of {rname: (rurl, future)} or None
+
+        def fan_out(key, fut):
+            try:
+                rmap = fut.result()
+            except Exception as e:
+                print(f"  ❌ {key}: role list failed: {e}"); roles[key].set_result(None); return
+            try:
+                roles[key].set_result({rname: (rurl, pool.submit(get_json, sess, rurl))
+                                       for rname, rurl in rmap.items()})
+            except Exception as e:                   # pool shut down under an abandoned scan
+                roles[key].set_exception(e)
+
+        for k in keys:
+            roles[k] = Future()
+            pool.submit(get_json, sess, f"{jira}/rest/api/2/project/{k}/role").add_done_callback(
+                partial(fan_out, k))
+
+        for key in sorted(roles):
+            details = roles[key].result()
+            if details is None:
+                yield key, None; continue
+            rows = []
+            for rname in sorted(details):
+                rurl, fut = details[rname]
+                try:
+                    names = user_actors(fut.result())
+                except Exception as e:
+                    print(f"  ❌ {key}/{rname}: {e}"); names = None
+                rows.append((rname, rurl, names))
+            yield key, rows
+
+# ───────────────────────────────────────────────────────────────────────────
+def load_snapshot(path, jira):
+    """Return {project_key: entry} from a snapshot taken of the same Jira, else {}."""
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        snap = json.load(f)
+    return snap.get("projects", {}) if snap.get("jira") == jira else {}
+
+def save_snapshot(path, jira, projects):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"jira": jira, "projects": projects}, f, sort_keys=True)
+    os.replace(tmp, path)
+
+def refresh(sess, jira, keys, snap, workers=DEFAULT_WORKERS):
+    """
+    Rescan `keys` and yield (project_key, entry) sorted by key, merged with
+    the previous entry in `snap`.  Roles that fail to load keep their old data
+    and leave the project's timestamp untouched so it is retried next run.
+    """
+    now = time.time()
+    for key, rows in scan_roles(sess, jira, keys, workers):
+        old = snap.get(key)
+        if rows is None:
+            if old: yield key, old
+            continue
+        prev = old["roles"] if old else {}
+        roles, complete = {}, True
+        for rname, rurl, names in rows:
+            if names is None:
+                complete = False
+                if rname in prev: roles[rname] = prev[rname]
+                continue
+            roles[rname] = {"url": rurl, "users": names, "fingerprint": fingerprint(sorted(names))}
+        entry = {"fetched": now if complete else (old or {}).get("fetched", 0),
+                 "fingerprint": fingerprint({r: [v["url"], v["fingerprint"]] for r, v in roles.items()}),
+                 "roles": roles}
+        if old and old["fingerprint"] != entry["fingerprint"]:
+            changed = sorted(r for r in set(roles) | set(prev)
+                             if prev.get(r, {}).get("fingerprint") != roles.get(r, {}).get("fingerprint"))
+            print(f"  ~ {key} changed: {', '.join(changed)}")
+        yield key, entry
+
 def main():
     jira   = input("Jira URL (e.g. https://jira.company.com): ").strip().rstrip("/")
     adm    = input("Admin username: ").strip()
     pw     = getpass("Admin password: ")
     outcsv = input("Output CSV path [roles_all_projects.csv]: ").strip() or "roles_all_projects.csv"
+    workers = int(input(f"Concurrent requests [{DEFAULT_WORKERS}]: ").strip() or DEFAULT_WORKERS)
+    snap_path = os.path.splitext(outcsv)[0] + ".snapshot.json"
+    incremental = input("Incremental refresh from snapshot? [y/N]: ").strip().lower() == "y"
+    ttl, force = 0, set()
+    if incremental:
+        ttl = float(input(f"Snapshot TTL hours [{SNAPSHOT_TTL_H}]: ").strip() or SNAPSHOT_TTL_H) * 3600
+        force = {k.strip() for k in input("Force rescan of projects (comma-separated) []: ").split(",") if k.strip()}
 
-    sess = requests.Session()
-    sess.auth, sess.verify = (adm, pw), False
+    sess = new_session(adm, pw, pool=workers)
+    set_host_limit(jira, workers)
 
     projects = sess.get(f"{jira}/rest/api/2/project").json()
     print(f"🔍 {len(projects)} project(s) found")
 
+    keys = [p.get("key") for p in projects]
+    snap = load_snapshot(snap_path, jira) if incremental else {}
+    now = time.time()
+    stale = {k for k in keys if k in force or k not in snap or now - snap[k]["fetched"] >= ttl}
+    if incremental:
+        print(f"♻️  {len(keys) - len(stale)} project(s) reused from snapshot, {len(stale)} to rescan")
+    fresh = ((k, snap[k]) for k in sorted(keys) if k not in stale)
+
     os.makedirs(os.path.dirname(outcsv) or ".", exist_ok=True)
-    total_written = 0
-    with open(outcsv, "w", newline="", encoding="utf-8") as f:
+    total_written, merged = 0, {}
+    with METRICS.phase("role scan"), open(outcsv, "w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["project_key", "role_name", "role_url", "usernames"])   # <- new column
 
-        for p in projects:
-            key = p.get("key")
-            roles_map = sess.get(f"{jira}/rest/api/2/project/{key}/role").json()
-            for rname, rurl in roles_map.items():
-                r = sess.get(rurl).json()
-                actors = [a for a in r.get("actors", []) if a.get("type") == "atlassian-user-role-actor"]
-                if not actors:
+        for key, entry in heapq.merge(fresh, refresh(sess, jira, stale, snap, workers),
+                                      key=itemgetter(0)):
+            merged[key] = entry
+            for rname in sorted(entry["roles"]):
+                role = entry["roles"][rname]
+                if not role["users"]:
                     continue
-                names = ";".join(a["name"] for a in actors)                 # <- collect users
-                w.writerow([key, rname, rurl, names])
+                w.writerow([key, rname, role["url"], ";".join(role["users"])])  # <- collect users
                 total_written += 1
-                print(f"  • {key}/{rname} ({len(actors)} user(s))")
+                if key in stale:
+                    print(f"  • {key}/{rname} ({len(role['users'])} user(s))")
 
+    save_snapshot(snap_path, jira, merged)
     print(f"✅ CSV written: {outcsv}  (roles with users: {total_written})")
+    print(f"💾 Snapshot saved: {snap_path}")
+    txt, prom = METRICS.write_reports(os.path.dirname(outcsv) or ".",
+                                      os.path.splitext(os.path.basename(outcsv))[0] + ".metrics")
+    print(f"📊 Metrics: {txt}, {prom}")
 
 if __name__ == "__main__":
     main()